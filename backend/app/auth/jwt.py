@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.services.statements import user_by_username
 
 pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
 security = HTTPBearer()
@@ -66,7 +67,7 @@ async def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = user_by_username(db, username)
     if user is None:
         raise credentials_exception
     
@@ -91,7 +92,7 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """Authenticate a user by username and password."""
-    user = db.query(User).filter(User.username == username).first()
+    user = user_by_username(db, username)
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
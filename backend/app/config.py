@@ -1,10 +1,23 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = os.environ.get("DATABASE_URL", "sqlite:///./app.db")
+    # Optional read replica used by the admin reporting endpoints
+    REPORTS_DATABASE_URL: Optional[str] = None
+    # Fall back to the primary when the replica is further behind than this
+    REPORTS_REPLICA_MAX_LAG_SECONDS: int = 30
+    # How long a replica lag measurement is trusted before it is taken again
+    REPORTS_REPLICA_LAG_CHECK_SECONDS: int = 10
+    # Longest a single reporting statement may run before it is cancelled (0 = no limit)
+    REPORTS_STATEMENT_TIMEOUT_MS: int = 30000
+    # Statements slower than this are logged with their query plan
+    SLOW_QUERY_THRESHOLD_MS: float = 500
+    # Minimum time between EXPLAINs (and log lines) for the same statement
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 300
     
     # JWT
     SECRET_KEY: str = os.environ.get("SECRET_KEY", "dc-landscaping-secret-key-change-in-production")
@@ -14,6 +27,54 @@ class Settings(BaseSettings):
     # App
     APP_NAME: str = "DC Landscaping"
     DEBUG: bool = True
+    # Create missing tables when the API starts. Disable in production and
+    # run `python init_db.py` as a release step instead.
+    CREATE_TABLES_ON_STARTUP: bool = True
+
+    # How long each server process trusts its cached workers/properties
+    DIMENSION_CACHE_TTL_SECONDS: int = 60
+
+    # How long a write's response is replayed for retries with the same
+    # Idempotency-Key, and how long a duplicate waits on a claim before
+    # taking it over (the gunicorn worker timeout)
+    IDEMPOTENCY_TTL_SECONDS: int = 60 * 60 * 24
+    IDEMPOTENCY_IN_FLIGHT_SECONDS: int = 120
+
+    # Offline timer events must have happened within this many hours
+    # before the upload, and no further ahead than the allowed clock skew
+    TIMER_EVENT_MAX_AGE_HOURS: int = 72
+    TIMER_EVENT_MAX_CLOCK_SKEW_SECONDS: int = 300
+
+    # Admission control (app/middleware/admission.py), per server process.
+    # Interactive: timers and CRUD. Heavy: reports, exports and imports.
+    INTERACTIVE_CONCURRENCY: int = 32
+    INTERACTIVE_QUEUE_TIMEOUT_SECONDS: float = 5
+    HEAVY_CONCURRENCY: int = 2
+    HEAVY_QUEUE_TIMEOUT_SECONDS: float = 15
+    HEAVY_MAX_QUEUE: int = 8
+
+    # Processes building workbooks for /reports/export-bundle
+    # (0 = number of CPUs, at most 4)
+    EXPORT_PROCESSES: int = 0
+
+    # Seasons kept in the hot time_records table (current season included)
+    ARCHIVE_KEEP_SEASONS: int = 2
+
+    # Columnar snapshot behind /reports/analytics, refreshed by
+    # refresh_analytics.py. Appends pick up new records; edits and deletes
+    # need a full rebuild, done once the snapshot is this old.
+    ANALYTICS_SNAPSHOT_DIR: str = "./analytics"
+    ANALYTICS_FULL_REBUILD_HOURS: float = 24
+
+    # Response compression (see benchmarks/compression.py for level trade-offs)
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    ZSTD_LEVEL: int = 3
+    # Report and export JSON is large and rarely requested: brotli 6 and
+    # zstd 6 roughly halve a preview compared with 4 and 3 for ~1 ms more
+    REPORTS_BROTLI_QUALITY: int = 6
+    REPORTS_ZSTD_LEVEL: int = 6
     
     class Config:
         env_file = ".env"
@@ -1,25 +1,302 @@
-import os
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./app.db")
+from app.config import settings
+from app.monitoring.slow_queries import SlowQueryLog
+
+DATABASE_URL = settings.DATABASE_URL
+
+
+def _create_engine(url: str):
+    """Create an engine with the connection options used for this app."""
+    if url.startswith("sqlite"):
+        return create_engine(url, connect_args={"check_same_thread": False})
+    if url.startswith("mysql://"):
+        url = url.replace("mysql://", "mysql+pymysql://", 1)
+    return create_engine(url, pool_pre_ping=True, pool_recycle=300)
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    if DATABASE_URL.startswith("mysql://"):
-        DATABASE_URL = DATABASE_URL.replace("mysql://", "mysql+pymysql://", 1)
-    engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
+
+engine = _create_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.REPORTS_DATABASE_URL:
+    reports_engine = _create_engine(settings.REPORTS_DATABASE_URL)
+    ReportsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=reports_engine)
+else:
+    reports_engine = None
+    ReportsSessionLocal = None
+
+class StatementTimeout(Exception):
+    """A statement ran past the timeout set by set_statement_timeout."""
+
+
+def _install_statement_timeout_hooks(engine):
+    """Time each statement on connections with a timeout, and clear it on checkin."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_statement_clock(conn, cursor, statement, parameters, context, executemany):
+        timeout_ms = conn.info.get("statement_timeout_ms")
+        if timeout_ms:
+            conn.info["statement_deadline"] = time.monotonic() + timeout_ms / 1000
+
+    @event.listens_for(engine, "checkin")
+    def _clear_statement_timeout(dbapi_connection, connection_record):
+        connection_record.info.pop("statement_deadline", None)
+        if connection_record.info.pop("statement_timeout_ms", None) is None or dbapi_connection is None:
+            return
+        if engine.dialect.name == "sqlite":
+            dbapi_connection.set_progress_handler(None, 0)
+        elif engine.dialect.name == "mysql":
+            cursor = dbapi_connection.cursor()
+            cursor.execute("SET SESSION MAX_EXECUTION_TIME = 0")
+            cursor.close()
+
+
+_install_statement_timeout_hooks(engine)
+if reports_engine is not None:
+    _install_statement_timeout_hooks(reports_engine)
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    explain_interval_seconds=settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+)
+slow_query_log.install(engine)
+if reports_engine is not None:
+    slow_query_log.install(reports_engine)
+
 Base = declarative_base()
 
 
+def _add_missing_columns(conn):
+    """Add columns declared on a model after its table was created.
+
+    Only columns that are nullable or have a server default can be added
+    to a table that already has rows.
+    """
+    from sqlalchemy import inspect as inspect_db
+    from sqlalchemy.schema import CreateColumn
+
+    inspector = inspect_db(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not (column.nullable or column.server_default is not None):
+                continue
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {ddl}")
+
+
+def _enable_sqlite_autoincrement(conn):
+    """Rebuild SQLite tables declared sqlite_autoincrement but created without it.
+
+    SQLite can't add AUTOINCREMENT to an existing table, so the rows are
+    copied into a new table that then takes the old one's name. Indexes
+    are recreated by init_db and full-text indexes by
+    install_search_indexes, so theirs are dropped with the old table.
+    """
+    from sqlalchemy.schema import CreateTable
+
+    for table in Base.metadata.sorted_tables:
+        if not table.dialect_options["sqlite"]["autoincrement"]:
+            continue
+        created = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+        ).scalar()
+        if created is None or "AUTOINCREMENT" in created.upper():
+            continue
+
+        rebuilt = f"{table.name}_rebuild"
+        new_table = table.to_metadata(Base.metadata, name=rebuilt)
+        try:
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {rebuilt}")
+            conn.execute(CreateTable(new_table))
+            columns = ", ".join(c.name for c in table.columns)
+            conn.exec_driver_sql(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {table.name}")
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {table.name}_fts")
+            conn.exec_driver_sql(f"DROP TABLE {table.name}")
+            conn.exec_driver_sql(f"ALTER TABLE {rebuilt} RENAME TO {table.name}")
+        finally:
+            Base.metadata.remove(new_table)
+
+
+def _skip_archived_ids(conn):
+    """Start new time record ids above every archived one (SQLite).
+
+    Keeps ids unique across both tables in databases whose ids were
+    handed out before time_records used AUTOINCREMENT.
+    """
+    highest = conn.exec_driver_sql("SELECT MAX(id) FROM time_records_archive").scalar()
+    if highest is None:
+        return
+    current = conn.exec_driver_sql("SELECT seq FROM sqlite_sequence WHERE name = 'time_records'").scalar()
+    if current is None:
+        conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('time_records', ?)", (highest,))
+    elif current < highest:
+        conn.exec_driver_sql("UPDATE sqlite_sequence SET seq = ? WHERE name = 'time_records'", (highest,))
+
+
+def init_db():
+    """Create any missing tables, columns and indexes.
+
+    Run as an explicit deploy step (python init_db.py) or from the app
+    startup hook, never at import time.
+    """
+    # Register every model on Base.metadata before creating tables
+    import app.models  # noqa: F401
+    from app.services.search import install_search_indexes
+
+    Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so add columns and indexes declared
+    # after they were made
+    with engine.begin() as conn:
+        _add_missing_columns(conn)
+        if conn.dialect.name == "sqlite":
+            _enable_sqlite_autoincrement(conn)
+            _skip_archived_ids(conn)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+    install_search_indexes(engine)
+
+
+def dispose_engines():
+    """Drop pooled connections inherited from a parent process.
+
+    Called in each server worker right after fork so workers never share
+    a database socket with the master or each other.
+    """
+    engine.dispose(close=False)
+    if reports_engine is not None:
+        reports_engine.dispose(close=False)
+
+
+def warm_connections():
+    """Open a connection per engine so the first request doesn't pay for it."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+    if reports_engine is not None:
+        try:
+            with reports_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            # An unreachable replica is handled per request by get_reports_db
+            pass
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def begin_write_transaction(db):
+    """Make sure the session's connection is inside a database transaction.
+
+    pysqlite only sends BEGIN before INSERT/UPDATE/DELETE. Until then a
+    SAVEPOINT opens a transaction of its own, and releasing it commits.
+    Code that relies on savepoints calls this first. On SQLite it begins
+    with IMMEDIATE so the write lock is taken up front instead of failing
+    on a concurrent writer halfway through.
+    """
+    conn = db.connection()
+    if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def set_statement_timeout(db, timeout_ms: int):
+    """Cancel any statement on the session's connection that runs past timeout_ms.
+
+    MySQL enforces it server-side with MAX_EXECUTION_TIME (SELECTs only).
+    SQLite checks a deadline from a progress handler. The timeout is
+    cleared when the connection goes back to the pool.
+    """
+    conn = db.connection()
+    conn.info["statement_timeout_ms"] = timeout_ms
+    if conn.dialect.name == "mysql":
+        conn.exec_driver_sql(f"SET SESSION MAX_EXECUTION_TIME = {int(timeout_ms)}")
+    elif conn.dialect.name == "sqlite":
+        info = conn.info
+
+        def interrupt():
+            return time.monotonic() > info.get("statement_deadline", float("inf"))
+
+        conn.connection.dbapi_connection.set_progress_handler(interrupt, 10000)
+
+
+def _is_statement_timeout(exc: OperationalError) -> bool:
+    code = exc.orig.args[0] if exc.orig is not None and exc.orig.args else None
+    # MySQL ER_QUERY_TIMEOUT; SQLite reports an interrupted statement
+    return code == 3024 or str(code) == "interrupted"
+
+
+def _measure_replica_lag() -> float:
+    """Return the replica lag in seconds, or infinity if it can't be used.
+
+    MySQL replicas report their lag through SHOW REPLICA STATUS. A server
+    that isn't replicating (such as a second local instance loaded from a
+    dump) and SQLite files have no lag to report and are treated as current.
+    """
+    try:
+        with reports_engine.connect() as conn:
+            if reports_engine.dialect.name != "mysql":
+                conn.execute(text("SELECT 1"))
+                return 0.0
+            try:
+                row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                lag_key = "Seconds_Behind_Source"
+            except Exception:
+                # MySQL < 8.0.22
+                row = conn.execute(text("SHOW SLAVE STATUS")).mappings().first()
+                lag_key = "Seconds_Behind_Master"
+    except Exception:
+        return float("inf")
+
+    if row is None:
+        return 0.0
+    lag = row.get(lag_key)
+    # NULL means replication is stopped or broken
+    return float(lag) if lag is not None else float("inf")
+
+
+_replica_state = {"checked_at": 0.0, "lag": float("inf")}
+
+
+def replica_is_fresh() -> bool:
+    """Whether the reports replica is within the allowed lag."""
+    if ReportsSessionLocal is None:
+        return False
+    now = time.monotonic()
+    if now - _replica_state["checked_at"] >= settings.REPORTS_REPLICA_LAG_CHECK_SECONDS:
+        _replica_state["lag"] = _measure_replica_lag()
+        _replica_state["checked_at"] = now
+    return _replica_state["lag"] <= settings.REPORTS_REPLICA_MAX_LAG_SECONDS
+
+
+def get_reports_db():
+    """Session for read-only reporting queries.
+
+    Uses the replica from REPORTS_DATABASE_URL when one is configured and
+    current enough, otherwise the primary database. Each statement is
+    limited to REPORTS_STATEMENT_TIMEOUT_MS; one that runs longer raises
+    StatementTimeout.
+    """
+    session_factory = ReportsSessionLocal if replica_is_fresh() else SessionLocal
+    db = session_factory()
+    try:
+        if settings.REPORTS_STATEMENT_TIMEOUT_MS:
+            set_statement_timeout(db, settings.REPORTS_STATEMENT_TIMEOUT_MS)
+        yield db
+    except OperationalError as exc:
+        if _is_statement_timeout(exc):
+            raise StatementTimeout(str(exc.orig)) from exc
+        raise
+    finally:
+        db.close()
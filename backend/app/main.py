@@ -1,26 +1,92 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import SessionLocal, StatementTimeout, engine, reports_engine, init_db, warm_connections
+from app.middleware import (
+    AdmissionMiddleware,
+    CompressionMiddleware,
+    IdempotencyMiddleware,
+    MetricsMiddleware,
+    RouteClass,
+    render_admission_metrics,
+)
+from app.monitoring import instrument_engine, instrument_orm, registry
+from app.services.dimensions import dimension_cache
 from app.routers import (
     auth_router,
     workers_router,
     properties_router,
     time_records_router,
-    reports_router
+    reports_router,
+    monitoring_router,
 )
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Per-route SQL metrics, see app/monitoring/metrics.py
+instrument_engine(engine)
+if reports_engine is not None:
+    instrument_engine(reports_engine)
+instrument_orm()
+
+
+def on_startup():
+    """Work that must happen before the first request is served.
+
+    Runs once per server process, after the fork when running under
+    gunicorn.conf.py, so anything warmed here is private to the worker.
+    """
+    if settings.CREATE_TABLES_ON_STARTUP:
+        init_db()
+    warm_connections()
+    with SessionLocal() as db:
+        dimension_cache.load(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    on_startup()
+    yield
+
 
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
     description="Internal Time & Cost Tracking System for DC Landscaping",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Innermost, so replayed responses still get CORS headers and compression
+app.add_middleware(
+    IdempotencyMiddleware,
+    session_factory=SessionLocal,
+    path_prefixes=["/api/time-records"],
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    in_flight_seconds=settings.IDEMPOTENCY_IN_FLIGHT_SECONDS,
+)
+
+# Bulkheads: reports and exports queue separately from field traffic
+route_classes = [
+    RouteClass(
+        "heavy",
+        ["/api/reports", "/api/time-records/import"],
+        limit=settings.HEAVY_CONCURRENCY,
+        queue_timeout=settings.HEAVY_QUEUE_TIMEOUT_SECONDS,
+        max_queue=settings.HEAVY_MAX_QUEUE,
+    ),
+    RouteClass(
+        "interactive",
+        ["/api/time-records", "/api/workers", "/api/properties", "/api/auth"],
+        limit=settings.INTERACTIVE_CONCURRENCY,
+        queue_timeout=settings.INTERACTIVE_QUEUE_TIMEOUT_SECONDS,
+    ),
+]
+app.add_middleware(AdmissionMiddleware, classes=route_classes)
+registry.add_collector(lambda: render_admission_metrics(route_classes))
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -30,10 +96,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses for crews on cellular connections
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    levels={
+        "gzip": settings.GZIP_LEVEL,
+        "br": settings.BROTLI_QUALITY,
+        "zstd": settings.ZSTD_LEVEL,
+    },
+    path_levels={
+        "/api/reports": {"br": settings.REPORTS_BROTLI_QUALITY, "zstd": settings.REPORTS_ZSTD_LEVEL},
+    },
+)
+
+# Outermost, so latency covers compression and the other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(workers_router, prefix="/api")
 app.include_router(properties_router, prefix="/api")
 app.include_router(time_records_router, prefix="/api")
 app.include_router(reports_router, prefix="/api")
+app.include_router(monitoring_router, prefix="/api")
+
+
+@app.exception_handler(StatementTimeout)
+async def statement_timeout_handler(request: Request, exc: StatementTimeout):
+    return JSONResponse(
+        {"detail": "The report took too long to run. Try a shorter date range."},
+        status_code=503,
+        headers={"Retry-After": "30"},
+    )
+
 
+@app.get("/api/health", tags=["Health"])
+async def health():
+    """Liveness check that doesn't touch the database."""
+    return {"status": "ok"}
@@ -0,0 +1,13 @@
+from app.middleware.admission import AdmissionMiddleware, RouteClass, render_admission_metrics
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.metrics import MetricsMiddleware
+
+__all__ = [
+    "AdmissionMiddleware",
+    "RouteClass",
+    "render_admission_metrics",
+    "CompressionMiddleware",
+    "IdempotencyMiddleware",
+    "MetricsMiddleware",
+]
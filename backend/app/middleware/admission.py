@@ -0,0 +1,122 @@
+"""Admission control: per-class concurrency limits with bounded queues.
+
+Routes are grouped into classes by path prefix, such as "interactive" for
+timer and CRUD routes and "heavy" for reports and exports. Each class has
+its own limit on concurrent requests and its own queue. A request that
+can't get a slot within the class's queue timeout, or that finds the
+queue full, gets 503 with Retry-After. A flood of report exports then
+waits in its own queue instead of taking every worker thread and database
+connection from the crews' timer requests.
+
+Limits are per server process.
+"""
+import asyncio
+import math
+from typing import Iterable, List, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class RouteClass:
+    def __init__(
+        self,
+        name: str,
+        path_prefixes: Iterable[str],
+        limit: int,
+        queue_timeout: float,
+        max_queue: Optional[int] = None,
+        retry_after: Optional[int] = None,
+    ):
+        self.name = name
+        self.path_prefixes = tuple(path_prefixes)
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.retry_after = retry_after if retry_after is not None else max(1, math.ceil(queue_timeout))
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it belongs to the server's event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    def matches(self, path: str) -> bool:
+        return path.startswith(self.path_prefixes)
+
+
+class AdmissionMiddleware:
+    """Limit concurrent requests per route class.
+
+    The first class whose prefixes match the path applies; requests that
+    match none are not limited. List more specific prefixes first.
+    """
+
+    def __init__(self, app: ASGIApp, classes: List[RouteClass]):
+        self.app = app
+        self.classes = classes
+
+    def _classify(self, path: str) -> Optional[RouteClass]:
+        for route_class in self.classes:
+            if route_class.matches(path):
+                return route_class
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        route_class = self._classify(scope["path"]) if scope["type"] == "http" else None
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._acquire(route_class):
+            route_class.rejected += 1
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(route_class.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        route_class.active += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.active -= 1
+            route_class.semaphore.release()
+
+    async def _acquire(self, route_class: RouteClass) -> bool:
+        semaphore = route_class.semaphore
+        if not semaphore.locked():
+            await semaphore.acquire()
+            return True
+        if route_class.max_queue is not None and route_class.waiting >= route_class.max_queue:
+            return False
+        route_class.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=route_class.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            route_class.waiting -= 1
+
+
+def render_admission_metrics(classes: List[RouteClass]) -> List[str]:
+    """Prometheus lines for each class, for MetricsRegistry.add_collector."""
+    lines = []
+    for name, attr, kind, help_text in (
+        ("admission_active_requests", "active", "gauge", "Requests holding a slot."),
+        ("admission_waiting_requests", "waiting", "gauge", "Requests queued for a slot."),
+        ("admission_rejected_total", "rejected", "counter", "Requests turned away with 503."),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for route_class in classes:
+            lines.append(f'{name}{{class="{route_class.name}"}} {getattr(route_class, attr)}')
+    return lines
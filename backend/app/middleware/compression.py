@@ -0,0 +1,222 @@
+"""Content-negotiated response compression.
+
+Picks brotli, zstd or gzip from the client's Accept-Encoding. brotli and
+zstandard are optional: an encoding is only offered when its module is
+installed. Buffered responses under the size threshold are sent as-is.
+Streamed responses are compressed chunk by chunk and flushed after each
+one, so they keep streaming to the client.
+"""
+import zlib
+from typing import Dict, Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+# Server preference when the client weights encodings equally
+SUPPORTED_ENCODINGS = [
+    name for name, module in (("br", brotli), ("zstd", zstandard), ("gzip", zlib)) if module is not None
+]
+
+DEFAULT_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}
+
+# Payloads that are already compressed gain nothing from another pass
+SKIP_CONTENT_TYPES = (
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument",
+    "image/",
+    "video/",
+    "audio/",
+    "text/event-stream",
+)
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str] = None) -> Optional[str]:
+    """Return the best encoding the client accepts, or None."""
+    available = list(available or SUPPORTED_ENCODINGS)
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in available:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class Compressor:
+    """Incremental compressor with a common interface for each encoding."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._obj.process(data)
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far without ending the stream."""
+        if self.encoding == "br":
+            return self._obj.flush()
+        if self.encoding == "zstd":
+            return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    compressor = Compressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing HTTP responses.
+
+    `levels` sets the level per encoding; `path_levels` overrides them for
+    requests whose path starts with the given prefix.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        levels: Dict[str, int] = None,
+        path_levels: Dict[str, Dict[str, int]] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+        self.path_levels = path_levels or {}
+
+    def _levels_for(self, path: str) -> Dict[str, int]:
+        for prefix, levels in self.path_levels.items():
+            if path.startswith(prefix):
+                return {**self.levels, **levels}
+        return self.levels
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        level = self._levels_for(scope["path"])[encoding]
+        responder = _CompressionResponder(send, encoding, level, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(self, send: Send, encoding: str, level: int, minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[Compressor] = None
+        self.passthrough = False
+
+    def _should_skip(self, headers: Headers, status: int) -> bool:
+        if status < 200 or status in (204, 304):
+            return True
+        if "content-encoding" in headers:
+            return True
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(SKIP_CONTENT_TYPES)
+
+    async def send(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            # Hold the headers until we know whether the body gets compressed
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = self._should_skip(headers, message["status"])
+            if not self.passthrough:
+                MutableHeaders(raw=message["headers"]).add_vary_header("Accept-Encoding")
+            return
+
+        if message_type != "http.response.body":
+            await self._send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self._send(self.start_message)
+                self.start_message = None
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body:
+                # Whole body in one message
+                if len(body) < self.minimum_size:
+                    await self._send(self.start_message)
+                    self.start_message = None
+                    await self._send(message)
+                    return
+                body = compress(body, self.encoding, self.level)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start_message)
+                self.start_message = None
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming response: compress and flush as chunks arrive
+            self.compressor = Compressor(self.encoding, self.level)
+            headers["Content-Encoding"] = self.encoding
+            if "content-length" in headers:
+                del headers["content-length"]
+            await self._send(self.start_message)
+            self.start_message = None
+
+        if more_body:
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+            if chunk:
+                await self._send({"type": "http.response.body", "body": chunk, "more_body": True})
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+            await self._send({"type": "http.response.body", "body": chunk})
@@ -0,0 +1,319 @@
+"""Idempotency-Key support for retried writes.
+
+A client that sends `Idempotency-Key: <unique value>` with a write can
+retry it safely. The first request runs normally and its response is kept
+for a while. A retry with the same key gets the kept response back without
+the endpoint running again. A duplicate that arrives while the first is
+still running waits for it and gets the same response.
+
+Keys live in the idempotency_keys table, one row per (user, key), so every
+server process sees them. The first request claims the key by inserting
+its row; a duplicate finds the row and polls it until the response is
+stored. A claim left behind by a crashed worker expires after
+`in_flight_seconds` and is taken over by the next retry. 5xx responses are
+not kept, so a retry after a server error runs again.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth.jwt import decode_token
+from app.models.idempotency_key import IdempotencyKey
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Polling interval for a duplicate waiting on a running request
+MIN_POLL_SECONDS = 0.05
+MAX_POLL_SECONDS = 1.0
+# How often each process deletes expired keys
+PURGE_INTERVAL_SECONDS = 300
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class InFlight:
+    """A claimed key whose request hasn't finished.
+
+    `owned` is True for the claim made by this request. `claimed_at`
+    identifies the claim, so a request whose claim expired and was taken
+    over can't overwrite the new one.
+    """
+
+    __slots__ = ("fingerprint", "claimed_at", "owned")
+
+    def __init__(self, fingerprint: str, claimed_at: datetime, owned: bool):
+        self.fingerprint = fingerprint
+        self.claimed_at = claimed_at
+        self.owned = owned
+
+
+def _now() -> datetime:
+    # Whole seconds, so the claim time compares equal on MySQL DATETIME too
+    return datetime.utcnow().replace(microsecond=0)
+
+
+def _entry(row: IdempotencyKey) -> Union[StoredResponse, InFlight]:
+    if row.status is None:
+        return InFlight(row.fingerprint, row.created_at, owned=False)
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers)]
+    return StoredResponse(row.fingerprint, row.status, headers, row.body)
+
+
+class IdempotencyStore:
+    """Idempotency keys and their responses in the database.
+
+    Blocking; the middleware calls it from the threadpool.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float = 86400,
+        in_flight_seconds: float = 120,
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.in_flight = timedelta(seconds=in_flight_seconds)
+        self._next_purge = 0.0
+
+    def claim(self, user: str, key: str, fingerprint: str) -> Union[StoredResponse, InFlight]:
+        """Claim the key for this request, or return its live entry."""
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+            self.purge()
+        with self.session_factory() as db:
+            while True:
+                now = _now()
+                db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.user == user,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.expires_at <= now,
+                    )
+                )
+                db.add(IdempotencyKey(
+                    user=user,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + self.in_flight,
+                ))
+                try:
+                    db.commit()
+                    return InFlight(fingerprint, now, owned=True)
+                except IntegrityError:
+                    db.rollback()
+                row = db.get(IdempotencyKey, (user, key))
+                # Gone already if its request failed meanwhile; claim again
+                if row is not None:
+                    return _entry(row)
+
+    def get(self, user: str, key: str) -> Optional[Union[StoredResponse, InFlight]]:
+        with self.session_factory() as db:
+            row = db.get(IdempotencyKey, (user, key))
+            if row is None or row.expires_at <= _now():
+                return None
+            return _entry(row)
+
+    def save(self, user: str, key: str, claim: InFlight, stored: StoredResponse):
+        headers = [[name.decode("latin-1"), value.decode("latin-1")] for name, value in stored.headers]
+        with self.session_factory() as db:
+            db.execute(
+                update(IdempotencyKey)
+                .where(*self._claimed(user, key, claim))
+                .values(
+                    status=stored.status,
+                    headers=json.dumps(headers),
+                    body=stored.body,
+                    expires_at=_now() + self.ttl,
+                )
+            )
+            db.commit()
+
+    def release(self, user: str, key: str, claim: InFlight):
+        """Drop a claim whose request failed, so a retry runs again."""
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(*self._claimed(user, key, claim)))
+            db.commit()
+
+    def purge(self):
+        with self.session_factory() as db:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _now()))
+            db.commit()
+
+    @staticmethod
+    def _claimed(user: str, key: str, claim: InFlight):
+        return (
+            IdempotencyKey.user == user,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at == claim.claimed_at,
+            IdempotencyKey.status.is_(None),
+        )
+
+
+def _error(status_code: int, detail: str) -> JSONResponse:
+    return JSONResponse({"detail": detail}, status_code=status_code)
+
+
+def _caller(headers: Headers) -> str:
+    """The user a key belongs to: the token's subject, else a hash of the header."""
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer":
+        payload = decode_token(token)
+        if payload and payload.get("sub"):
+            return str(payload["sub"])[:64]
+    return "auth:" + hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+
+class IdempotencyMiddleware:
+    """Replay responses for writes repeated with the same Idempotency-Key.
+
+    Only requests with the header, one of MUTATING_METHODS and a path under
+    one of `path_prefixes` are handled. Keys are scoped to the user.
+    Reusing a key with a different method, path or body is rejected with
+    422.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        session_factory: Callable[[], Session],
+        path_prefixes: Iterable[str] = ("/",),
+        ttl_seconds: float = 86400,
+        in_flight_seconds: float = 120,
+    ):
+        self.app = app
+        self.path_prefixes = tuple(path_prefixes)
+        self.store = IdempotencyStore(session_factory, ttl_seconds=ttl_seconds, in_flight_seconds=in_flight_seconds)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or not scope["path"].startswith(self.path_prefixes)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get(HEADER)
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            await _error(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        digest = hashlib.sha256(f"{scope['method']} {scope['path']}\n".encode())
+        digest.update(body)
+        fingerprint = digest.hexdigest()
+        user = _caller(headers)
+
+        entry = None
+        delay = MIN_POLL_SECONDS
+        while True:
+            if entry is None:
+                entry = await run_in_threadpool(self.store.claim, user, idempotency_key, fingerprint)
+            if entry.fingerprint != fingerprint:
+                await _error(422, "Idempotency-Key was already used for a different request")(scope, receive, send)
+                return
+            if isinstance(entry, StoredResponse):
+                await self._replay(entry, send)
+                return
+            if entry.owned:
+                break
+            # Same request still running, maybe in another process: wait
+            # for its outcome. If it failed or its claim expired, the next
+            # round claims the key here instead.
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_SECONDS)
+            entry = await run_in_threadpool(self.store.get, user, idempotency_key)
+
+        stored = None
+        try:
+            stored = await self._run(scope, body, receive, send, fingerprint)
+        finally:
+            if stored is not None and stored.status < 500:
+                await run_in_threadpool(self.store.save, user, idempotency_key, entry, stored)
+            else:
+                await run_in_threadpool(self.store.release, user, idempotency_key, entry)
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Client went away before sending the body
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _run(self, scope: Scope, body: bytes, receive: Receive, send: Send, fingerprint: str):
+        """Run the app on the buffered body, capturing what it sends."""
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = None
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks = []
+
+        client_gone = False
+
+        async def capture_send(message: Message):
+            nonlocal status, response_headers, client_gone
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            if client_gone:
+                return
+            try:
+                await send(message)
+            except OSError:
+                # The client dropped the connection. Finish anyway so the
+                # response is kept for its retry.
+                client_gone = True
+
+        await self.app(scope, replay_receive, capture_send)
+        if status is None:
+            return None
+        return StoredResponse(fingerprint, status, response_headers, b"".join(chunks))
+
+    async def _replay(self, stored: StoredResponse, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
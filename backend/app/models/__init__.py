@@ -1,7 +1,10 @@
 from app.models.user import User, UserRole
 from app.models.worker import Worker
 from app.models.property import Property
-from app.models.time_record import TimeRecord, time_record_workers
+from app.models.time_record import TimeRecord, time_record_workers, compute_totals
+from app.models.archive import ArchivedTimeRecord, time_record_workers_archive
+from app.models.timer_event import TimerEvent
+from app.models.idempotency_key import IdempotencyKey
 
 __all__ = [
     "User",
@@ -10,4 +13,9 @@ __all__ = [
     "Property",
     "TimeRecord",
     "time_record_workers",
+    "compute_totals",
+    "ArchivedTimeRecord",
+    "time_record_workers_archive",
+    "TimerEvent",
+    "IdempotencyKey",
 ]
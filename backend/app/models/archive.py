@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Boolean, Date, Time, ForeignKey, Table, Numeric
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+# Closed seasons moved out of time_records / time_record_workers by
+# app.services.archival. Rows keep their original ids.
+time_record_workers_archive = Table(
+    "time_record_workers_archive",
+    Base.metadata,
+    Column("time_record_id", Integer, ForeignKey("time_records_archive.id", ondelete="CASCADE"), primary_key=True),
+    Column("worker_id", Integer, ForeignKey("workers.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+class ArchivedTimeRecord(Base):
+    """Read-only copy of an archived TimeRecord, with the same attributes."""
+
+    __tablename__ = "time_records_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
+    work_date = Column(Date, nullable=False, index=True)
+    start_time = Column(Time, nullable=False)
+    end_time = Column(Time, nullable=True)
+    break_minutes = Column(Integer, default=0)
+    is_manual_entry = Column(Boolean, default=False)
+    notes = Column(String(500), nullable=True)
+    total_minutes = Column(Integer, nullable=True)
+    total_cost = Column(Numeric(10, 2), nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
+    property = relationship("Property")
+    workers = relationship("Worker", secondary=time_record_workers_archive)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, Text
+from sqlalchemy.dialects.mysql import LONGBLOB
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """A write sent with an Idempotency-Key and, once it finished, its response.
+
+    Shared by every server process, so a retry is replayed whichever
+    worker it reaches. `status` is NULL while the first request is still
+    running.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # JWT subject of the caller, or a hash of its Authorization header
+    user = Column(String(64), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    # sha256 of method, path and body; a different request with the key gets 422
+    fingerprint = Column(String(64), nullable=False)
+    status = Column(Integer, nullable=True)
+    # JSON list of [name, value] response headers
+    headers = Column(Text, nullable=True)
+    body = Column(LargeBinary().with_variant(LONGBLOB, "mysql"), nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    # In flight: when another worker may take the key over. Done: when it is purged.
+    expires_at = Column(DateTime, nullable=False, index=True)
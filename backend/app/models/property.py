@@ -8,7 +8,7 @@ class Property(Base):
     __tablename__ = "properties"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(100), nullable=False)
+    name = Column(String(100), nullable=False, index=True)
     address = Column(String(255), nullable=True)
     is_spring_cleanup = Column(Boolean, default=False)
     is_fall_cleanup = Column(Boolean, default=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, Time, ForeignKey, Table, Numeric
+from sqlalchemy import Column, Integer, String, Boolean, Date, Time, ForeignKey, Table, Numeric, Index
 from sqlalchemy.orm import relationship
 from datetime import date, time
 
@@ -11,6 +11,8 @@ time_record_workers = Table(
     Base.metadata,
     Column("time_record_id", Integer, ForeignKey("time_records.id", ondelete="CASCADE"), primary_key=True),
     Column("worker_id", Integer, ForeignKey("workers.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key only serves lookups by record; overlap checks go by worker
+    Index("ix_time_record_workers_worker_id", "worker_id"),
 )
 
 
@@ -19,7 +21,7 @@ class TimeRecord(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
-    work_date = Column(Date, nullable=False, default=date.today)
+    work_date = Column(Date, nullable=False, default=date.today, index=True)
     start_time = Column(Time, nullable=False)
     end_time = Column(Time, nullable=True)
     break_minutes = Column(Integer, default=0)
@@ -30,6 +32,10 @@ class TimeRecord(Base):
     total_minutes = Column(Integer, nullable=True)
     total_cost = Column(Numeric(10, 2), nullable=True)
     
+    # Bumped on every UPDATE, which only applies if the row still has the
+    # version it was read with (StaleDataError otherwise)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    
     # Relationships
     property = relationship("Property", back_populates="time_records")
     workers = relationship(
@@ -38,17 +44,47 @@ class TimeRecord(Base):
         back_populates="time_records"
     )
     
+    __mapper_args__ = {"version_id_col": version}
+    # Archived rows keep their ids, so SQLite must never hand out the
+    # highest ids again once they've left this table (MySQL 8 doesn't)
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    def replace_workers(self, workers):
+        """Give the record a new crew.
+
+        Crew changes only touch time_record_workers, which on its own
+        wouldn't update the row, so a different crew bumps the version
+        here. The UPDATE still checks the version the record was read at.
+        """
+        if self.id is not None and {w.id for w in workers} != {w.id for w in self.workers}:
+            self.version += 1
+        self.workers = workers
+
     def calculate_totals(self, workers_list):
         """Calculate total minutes and cost based on workers."""
         if self.start_time and self.end_time:
-            start_minutes = self.start_time.hour * 60 + self.start_time.minute
-            end_minutes = self.end_time.hour * 60 + self.end_time.minute
-            work_minutes = end_minutes - start_minutes - (self.break_minutes or 0)
-            self.total_minutes = max(0, work_minutes)
-            
-            # Calculate cost based on each worker's rate
-            total_cost = 0
-            hours = self.total_minutes / 60
-            for worker in workers_list:
-                total_cost += float(worker.hourly_rate) * hours
-            self.total_cost = total_cost
+            self.total_minutes, self.total_cost = compute_totals(
+                self.start_time,
+                self.end_time,
+                self.break_minutes,
+                [worker.hourly_rate for worker in workers_list],
+            )
+
+
+def compute_totals(start_time: time, end_time: time, break_minutes, hourly_rates):
+    """Total minutes and cost of a record, the rules behind calculate_totals.
+
+    Works on plain values so bulk loaders can apply the same rules
+    without building ORM objects.
+    """
+    start_minutes = start_time.hour * 60 + start_time.minute
+    end_minutes = end_time.hour * 60 + end_time.minute
+    work_minutes = end_minutes - start_minutes - (break_minutes or 0)
+    total_minutes = max(0, work_minutes)
+
+    # Calculate cost based on each worker's rate
+    total_cost = 0
+    hours = total_minutes / 60
+    for rate in hourly_rates:
+        total_cost += float(rate) * hours
+    return total_minutes, total_cost
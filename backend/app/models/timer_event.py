@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+
+from app.database import Base
+
+
+class TimerEvent(Base):
+    """An offline timer event applied through POST /time-records/events.
+
+    Kept so a re-uploaded event returns its first outcome instead of
+    being applied twice.
+    """
+
+    __tablename__ = "timer_events"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    event_id = Column(String(64), primary_key=True)
+    event_type = Column(String(10), nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    # Record created or changed by the event; kept when the record is deleted
+    time_record_id = Column(Integer, nullable=True, index=True)
+    status = Column(String(10), nullable=False)
+    detail = Column(String(255), nullable=True)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -8,7 +8,7 @@ class Worker(Base):
     __tablename__ = "workers"
     
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(50), nullable=False)
+    name = Column(String(50), nullable=False, index=True)
     phone = Column(String(20), nullable=True)
     hourly_rate = Column(Numeric(10, 2), default=20.00, nullable=False)
     is_active = Column(Boolean, default=True)
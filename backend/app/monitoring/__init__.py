@@ -0,0 +1,15 @@
+from app.monitoring.metrics import (
+    registry,
+    instrument_engine,
+    instrument_orm,
+    current_request_stats,
+)
+from app.monitoring.slow_queries import SlowQueryLog
+
+__all__ = [
+    "registry",
+    "instrument_engine",
+    "instrument_orm",
+    "current_request_stats",
+    "SlowQueryLog",
+]
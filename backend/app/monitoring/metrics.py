@@ -0,0 +1,219 @@
+"""Per-route request and database metrics in Prometheus text format.
+
+The metrics middleware opens a RequestStats for each request. SQLAlchemy
+event hooks installed by instrument_engine add query counts, database
+time, rows loaded, connection pool wait and statement cache hits and
+misses to the stats of the request that issued them. When the request
+finishes, the stats are folded into the process-wide registry under the
+route template (e.g. /api/time-records/{record_id}).
+
+Metrics are per process. With several gunicorn workers each one reports
+its own counters.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.orm import Mapper
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestStats:
+    """Counters for a single in-flight request."""
+
+    __slots__ = (
+        "scope", "db_queries", "db_seconds", "db_rows", "pool_wait_seconds",
+        "db_cache_hits", "db_cache_misses",
+    )
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.db_rows = 0
+        self.pool_wait_seconds = 0.0
+        self.db_cache_hits = 0
+        self.db_cache_misses = 0
+
+    @property
+    def route_path(self) -> str:
+        """Route template of the request, once routing has matched it."""
+        # FastAPI stores the matched route in the scope during routing
+        route = self.scope.get("route") if self.scope is not None else None
+        return getattr(route, "path", None) or "unmatched"
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+def begin_request(scope=None) -> Tuple[RequestStats, object]:
+    stats = RequestStats(scope)
+    return stats, _current_request.set(stats)
+
+
+def end_request(token):
+    _current_request.reset(token)
+
+
+class _RouteMetrics:
+    __slots__ = (
+        "buckets", "count", "latency_sum", "statuses", "db_queries", "db_seconds", "db_rows",
+        "pool_wait_seconds", "db_cache_hits", "db_cache_misses",
+    )
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency_sum = 0.0
+        self.statuses: Dict[int, int] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.db_rows = 0
+        self.pool_wait_seconds = 0.0
+        self.db_cache_hits = 0
+        self.db_cache_misses = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Append the lines returned by `collector` to every render."""
+        self._collectors.append(collector)
+
+    def observe(self, method: str, status: int, seconds: float, stats: RequestStats):
+        route = stats.route_path
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = _RouteMetrics()
+            metrics.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            metrics.count += 1
+            metrics.latency_sum += seconds
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.db_queries += stats.db_queries
+            metrics.db_seconds += stats.db_seconds
+            metrics.db_rows += stats.db_rows
+            metrics.pool_wait_seconds += stats.pool_wait_seconds
+            metrics.db_cache_hits += stats.db_cache_hits
+            metrics.db_cache_misses += stats.db_cache_misses
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines = [
+                "# HELP http_request_duration_seconds Request latency by route template.",
+                "# TYPE http_request_duration_seconds histogram",
+            ]
+            for (method, route), m in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS, m.buckets):
+                    cumulative += count
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {m.count}')
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {m.latency_sum:.6f}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} {m.count}")
+
+            lines += [
+                "# HELP http_requests_total Requests by route template and status code.",
+                "# TYPE http_requests_total counter",
+            ]
+            for (method, route), m in routes:
+                for status, count in sorted(m.statuses.items()):
+                    lines.append(
+                        f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+                    )
+
+            for name, attr, help_text in (
+                ("http_request_db_queries_total", "db_queries", "SQL statements executed while serving the route."),
+                ("http_request_db_seconds_total", "db_seconds", "Time spent executing SQL for the route."),
+                ("http_request_db_rows_total", "db_rows", "ORM rows loaded for the route."),
+                ("http_request_pool_wait_seconds_total", "pool_wait_seconds", "Time spent waiting for a pooled connection."),
+                ("http_request_db_cache_hits_total", "db_cache_hits", "Statements whose compiled SQL came from the statement cache."),
+                ("http_request_db_cache_misses_total", "db_cache_misses", "Statements compiled and added to the statement cache."),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (method, route), m in routes:
+                    value = getattr(m, attr)
+                    value = f"{value:.6f}" if isinstance(value, float) else str(value)
+                    lines.append(f'{name}{{method="{method}",route="{_escape(route)}"}} {value}')
+
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - started
+        # Statements without a cache key (DDL, some text()) count as neither
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is CacheStats.CACHE_HIT:
+            stats.db_cache_hits += 1
+        elif cache_hit is CacheStats.CACHE_MISS:
+            stats.db_cache_misses += 1
+
+
+def _on_load(target, context):
+    stats = _current_request.get()
+    if stats is not None:
+        stats.db_rows += 1
+
+
+def instrument_engine(engine):
+    """Attach the metrics hooks to an engine. Safe to call once per engine."""
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    # SQLAlchemy has no event before a pool checkout, so time the call that
+    # blocks on the pool (including opening a new connection when needed).
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection():
+        started = time.perf_counter()
+        try:
+            return raw_connection()
+        finally:
+            stats = _current_request.get()
+            if stats is not None:
+                stats.pool_wait_seconds += time.perf_counter() - started
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_instrumented = True
+
+
+def instrument_orm():
+    """Count ORM rows loaded for every mapped class."""
+    if not event.contains(Mapper, "load", _on_load):
+        event.listen(Mapper, "load", _on_load)
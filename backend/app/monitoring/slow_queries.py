@@ -0,0 +1,170 @@
+"""Slow-query log with EXPLAIN capture.
+
+Statements slower than the threshold are grouped by a fingerprint of
+their normalized SQL. Each fingerprint keeps its duration stats, the
+shape of its bound parameters, the routes that issued it and the most
+recent query plan. EXPLAIN (EXPLAIN QUERY PLAN on SQLite) and the log
+line are rate-limited per fingerprint, so a hot slow statement can't
+flood the log or double the load on the database.
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.monitoring.metrics import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def normalize_sql(statement: str) -> str:
+    """Replace literals and placeholders with ? and collapse IN lists."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    return _PLACEHOLDER_LIST.sub("?, ...", sql)
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Describe bound parameters by type only, never by value."""
+    if executemany:
+        rows = list(parameters or [])
+        if not rows:
+            return "[]"
+        return f"{len(rows)} x {parameter_shape(rows[0], False)}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if parameters:
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return "()"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float = 500, explain_interval_seconds: float = 300, max_entries: int = 200):
+        self.threshold_ms = threshold_ms
+        self.explain_interval_seconds = explain_interval_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+
+    def record(self, conn, cursor, statement, parameters, executemany: bool, duration_ms: float):
+        normalized = normalize_sql(statement)
+        key = fingerprint(normalized)
+        stats = current_request_stats()
+        route = stats.route_path if stats is not None else None
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "fingerprint": key,
+                    "sql": normalized,
+                    "parameter_shape": parameter_shape(parameters, executemany),
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": {},
+                    "first_seen": now,
+                    "last_seen": now,
+                    "explain": None,
+                    "explained_at": 0.0,
+                }
+                self._entries[key] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = now
+            if route:
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+
+            due = now - entry["explained_at"] >= self.explain_interval_seconds
+            if due:
+                # Claim the slot before releasing the lock so concurrent
+                # requests don't explain the same statement
+                entry["explained_at"] = now
+
+        if not due:
+            return
+
+        logger.warning(
+            "Slow query %s (%.1f ms) route=%s params=%s: %s",
+            key, duration_ms, route, entry["parameter_shape"], normalized,
+        )
+        plan = self._explain(conn, statement, parameters, executemany)
+        with self._lock:
+            entry["explain"] = plan
+
+    def _explain(self, conn, statement: str, parameters, executemany: bool) -> Optional[List[str]]:
+        if not statement.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+        # Use a separate DBAPI cursor so the statement's own results and
+        # our engine hooks are left alone
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            return [" | ".join(str(col) for col in row) for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            cursor.close()
+
+    def entries(self) -> List[dict]:
+        """Logged statements, slowest first."""
+        with self._lock:
+            entries = [dict(e, routes=dict(e["routes"])) for e in self._entries.values()]
+        for e in entries:
+            e["avg_ms"] = round(e["total_ms"] / e["count"], 2)
+            e["total_ms"] = round(e["total_ms"], 2)
+            e["max_ms"] = round(e["max_ms"], 2)
+            e["first_seen"] = datetime.fromtimestamp(e["first_seen"]).isoformat()
+            e["last_seen"] = datetime.fromtimestamp(e["last_seen"]).isoformat()
+            e["explained_at"] = datetime.fromtimestamp(e["explained_at"]).isoformat() if e["explained_at"] else None
+        return sorted(entries, key=lambda e: e["max_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def install(self, engine):
+        """Attach the timing hooks to an engine."""
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            duration_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+            if duration_ms >= self.threshold_ms:
+                try:
+                    self.record(conn, cursor, statement, parameters, executemany, duration_ms)
+                except Exception:
+                    logger.exception("Failed to record slow query")
+
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
@@ -0,0 +1,24 @@
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any) -> Any:
+    """Encode types orjson doesn't handle natively the way pydantic does."""
+    if isinstance(obj, Decimal):
+        # pydantic serializes Decimal as a string, keep the wire format
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Returning one from an endpoint skips FastAPI's response_model
+    validation, so only use it with content built from trusted rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default)
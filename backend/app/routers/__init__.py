@@ -3,6 +3,7 @@ from app.routers.workers import router as workers_router
 from app.routers.properties import router as properties_router
 from app.routers.time_records import router as time_records_router
 from app.routers.reports import router as reports_router
+from app.routers.monitoring import router as monitoring_router
 
 __all__ = [
     "auth_router",
@@ -10,4 +11,5 @@ __all__ = [
     "properties_router",
     "time_records_router",
     "reports_router",
+    "monitoring_router",
 ]
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import PlainTextResponse
+
+from app.models.user import User
+from app.auth import get_current_admin
+from app.database import slow_query_log
+from app.monitoring import registry
+
+router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(current_user: User = Depends(get_current_admin)):
+    """Per-route latency and SQL metrics in Prometheus text format (admin only)."""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(current_user: User = Depends(get_current_admin)):
+    """Statements over the slow-query threshold with their plans (admin only)."""
+    return {
+        "threshold_ms": slow_query_log.threshold_ms,
+        "queries": slow_query_log.entries(),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries(current_user: User = Depends(get_current_admin)):
+    """Reset the slow-query log (admin only)."""
+    slow_query_log.clear()
+    return None
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,6 +6,9 @@ from app.database import get_db
 from app.models.property import Property
 from app.models.user import User
 from app.schemas.property import PropertyCreate, PropertyUpdate, PropertyResponse
+from app.services.dimensions import dimension_cache
+from app.services.statements import property_by_id
+from app.services.search import search
 from app.auth import get_current_user
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
@@ -24,6 +27,18 @@ async def get_properties(
     return query.order_by(Property.name).all()
 
 
+@router.get("/search", response_model=List[PropertyResponse])
+async def search_properties(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    include_inactive: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Typeahead search on name or address, best matches first."""
+    return search(db, Property, q, limit, include_inactive)
+
+
 @router.get("/{property_id}", response_model=PropertyResponse)
 async def get_property(
     property_id: int,
@@ -31,7 +46,7 @@ async def get_property(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific property."""
-    property = db.query(Property).filter(Property.id == property_id).first()
+    property = property_by_id(db, property_id)
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     return property
@@ -52,6 +67,7 @@ async def create_property(
     )
     db.add(property)
     db.commit()
+    dimension_cache.invalidate()
     db.refresh(property)
     return property
 
@@ -64,7 +80,7 @@ async def update_property(
     current_user: User = Depends(get_current_user)
 ):
     """Update a property. Both admin and worker can update."""
-    property = db.query(Property).filter(Property.id == property_id).first()
+    property = property_by_id(db, property_id)
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     
@@ -73,6 +89,7 @@ async def update_property(
         setattr(property, field, value)
     
     db.commit()
+    dimension_cache.invalidate()
     db.refresh(property)
     return property
 
@@ -84,10 +101,11 @@ async def delete_property(
     current_user: User = Depends(get_current_user)
 ):
     """Delete a property. Actually just deactivates."""
-    property = db.query(Property).filter(Property.id == property_id).first()
+    property = property_by_id(db, property_id)
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     
     property.is_active = False
     db.commit()
+    dimension_cache.invalidate()
     return None
@@ -1,20 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from sqlalchemy import func
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import date, timedelta
 from decimal import Decimal
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_reports_db
 from app.models.time_record import TimeRecord
-from app.models.worker import Worker
-from app.models.property import Property
 from app.models.user import User
 from app.auth import get_current_admin
 from app.services.excel import create_report_excel
+from app.responses import ORJSONResponse
+from app.services.dimensions import dimension_cache
+from app.services.reporting import Report, ReportRow, load_report_rows, run_report
+from app.services.export_bundle import group_by_property, stream_bundle
+from app.services.overlaps import find_existing_overlaps
 
+# Handlers here are plain `def`s so they run in the threadpool. Long report
+# queries then don't stall the event loop that serves timer requests.
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
@@ -37,8 +43,8 @@ class DashboardStats(BaseModel):
 
 
 @router.get("/dashboard", response_model=DashboardStats)
-async def get_dashboard_stats(
-    db: Session = Depends(get_db),
+def get_dashboard_stats(
+    db: Session = Depends(get_reports_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Get dashboard statistics (admin only)."""
@@ -74,7 +80,7 @@ async def get_dashboard_stats(
     year_cost = sum(float(r.total_cost or 0) for r in year_records)
     
     # Active workers
-    active_workers = db.query(Worker).filter(Worker.is_active == True).count()
+    active_workers = sum(1 for w in dimension_cache.workers(db).values() if w.is_active)
     
     return DashboardStats(
         today_hours=round(today_hours, 2),
@@ -88,144 +94,157 @@ async def get_dashboard_stats(
     )
 
 
+def _summary(report: Report) -> ReportSummary:
+    return ReportSummary(
+        total_hours=round(report.total_hours, 2),
+        total_cost=round(float(report.total_cost), 2),
+        records_count=report.records_count,
+        properties_count=len(report.properties)
+    )
+
+
+def _preview_row(r: ReportRow) -> dict:
+    return {
+        "id": r.id,
+        "date": r.work_date.isoformat(),
+        "property": r.property_name,
+        "type": r.cleanup_type,
+        "workers": r.worker_names,
+        "hours": round((r.total_minutes or 0) / 60, 2),
+        "cost": round(float(r.total_cost or 0), 2)
+    }
+
+
+def _preview_rows(rows: List[ReportRow], shape: str) -> dict:
+    """{"records": [...]}, plus deduplicated workers and properties when normalized."""
+    if shape != "normalized":
+        return {"records": [_preview_row(r) for r in rows]}
+    records = []
+    workers = {}
+    properties = {}
+    for r in rows:
+        if r.property_id not in properties:
+            properties[r.property_id] = {"name": r.property_name, "type": r.cleanup_type}
+        for worker_id, name in zip(r.worker_ids, r.worker_names):
+            workers.setdefault(worker_id, {"name": name})
+        records.append({
+            "id": r.id,
+            "date": r.work_date.isoformat(),
+            "property_id": r.property_id,
+            "worker_ids": r.worker_ids,
+            "hours": round((r.total_minutes or 0) / 60, 2),
+            "cost": round(float(r.total_cost or 0), 2)
+        })
+    return {
+        "records": records,
+        "workers": {str(k): v for k, v in workers.items()},
+        "properties": {str(k): v for k, v in properties.items()},
+    }
+
+
+def _breakdown(items, with_cost: bool = True) -> list:
+    result = []
+    for b in sorted(items, key=lambda b: (-b.total_minutes, b.name)):
+        item = {"id": b.id, "name": b.name, "hours": round(b.total_minutes / 60, 2)}
+        if with_cost:
+            item["cost"] = round(float(b.total_cost), 2)
+        item["records"] = b.records_count
+        result.append(item)
+    return result
+
+
 @router.get("/summary", response_model=ReportSummary)
-async def get_report_summary(
+def get_report_summary(
     start_date: date,
     end_date: date,
     property_id: Optional[int] = None,
     cleanup_type: Optional[str] = None,  # "spring", "fall", or None for all
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_reports_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Get report summary for the given filters (admin only)."""
-    query = db.query(TimeRecord).options(
-        joinedload(TimeRecord.property)
-    ).filter(
-        TimeRecord.work_date >= start_date,
-        TimeRecord.work_date <= end_date,
-        TimeRecord.total_minutes.isnot(None)
-    )
-    
-    if property_id:
-        query = query.filter(TimeRecord.property_id == property_id)
-    
-    records = query.all()
-    
-    # Filter by cleanup type
-    if cleanup_type == "spring":
-        records = [r for r in records if r.property.is_spring_cleanup]
-    elif cleanup_type == "fall":
-        records = [r for r in records if r.property.is_fall_cleanup]
-    
-    total_hours = sum(r.total_minutes or 0 for r in records) / 60
-    total_cost = sum(float(r.total_cost or 0) for r in records)
-    properties = set(r.property_id for r in records)
-    
-    return ReportSummary(
-        total_hours=round(total_hours, 2),
-        total_cost=round(total_cost, 2),
-        records_count=len(records),
-        properties_count=len(properties)
-    )
+    return _summary(run_report(db, start_date, end_date, property_id, cleanup_type, limit=0))
 
 
 @router.get("/preview")
-async def preview_report(
+def preview_report(
     start_date: date,
     end_date: date,
     property_id: Optional[int] = None,
     cleanup_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    limit: Optional[int] = Query(None, ge=0),  # all records when omitted
+    offset: int = Query(0, ge=0),
+    shape: Literal["full", "normalized"] = "full",
+    db: Session = Depends(get_reports_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Preview report data (admin only)."""
-    query = db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(
-        TimeRecord.work_date >= start_date,
-        TimeRecord.work_date <= end_date,
-        TimeRecord.total_minutes.isnot(None)
-    )
-    
-    if property_id:
-        query = query.filter(TimeRecord.property_id == property_id)
-    
-    records = query.order_by(TimeRecord.work_date.desc()).all()
-    
-    # Filter by cleanup type
-    if cleanup_type == "spring":
-        records = [r for r in records if r.property.is_spring_cleanup]
-    elif cleanup_type == "fall":
-        records = [r for r in records if r.property.is_fall_cleanup]
+    """Preview report data (admin only).
+
+    With shape=normalized, records carry property_id and worker_ids and
+    the names are sent once in `properties` and `workers`, keyed by id.
+    """
+    report = run_report(db, start_date, end_date, property_id, cleanup_type, offset, limit)
     
-    result = []
-    total_hours = 0
-    total_cost = 0
-    
-    for r in records:
-        hours = (r.total_minutes or 0) / 60
-        cost = float(r.total_cost or 0)
-        total_hours += hours
-        total_cost += cost
-        
-        cleanup_type_str = ""
-        if r.property.is_spring_cleanup:
-            cleanup_type_str = "Spring"
-        elif r.property.is_fall_cleanup:
-            cleanup_type_str = "Fall"
-        
-        result.append({
-            "id": r.id,
-            "date": r.work_date.isoformat(),
-            "property": r.property.name,
-            "type": cleanup_type_str,
-            "workers": [w.name for w in r.workers],
-            "hours": round(hours, 2),
-            "cost": round(cost, 2)
-        })
+    return ORJSONResponse({
+        **_preview_rows(report.rows, shape),
+        "total_hours": round(report.total_hours, 2),
+        "total_cost": round(float(report.total_cost), 2),
+        "total_records": report.records_count
+    })
+
+
+@router.get("/overview")
+def report_overview(
+    start_date: date,
+    end_date: date,
+    property_id: Optional[int] = None,
+    cleanup_type: Optional[str] = None,
+    limit: int = Query(100, ge=0, le=1000),
+    offset: int = Query(0, ge=0),
+    shape: Literal["full", "normalized"] = "full",  # of the records, as for preview
+    db: Session = Depends(get_reports_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Summary, per-property and per-worker totals and a page of records (admin only).
+
+    Everything the Reports view shows, from one pass over the records.
+    Worker totals count each record's hours once per crew member and
+    carry no cost, since record costs aren't split between workers.
+    """
+    report = run_report(db, start_date, end_date, property_id, cleanup_type, offset, limit)
     
-    return {
-        "records": result,
-        "total_hours": round(total_hours, 2),
-        "total_cost": round(total_cost, 2)
-    }
+    return ORJSONResponse({
+        "summary": _summary(report).model_dump(),
+        "by_property": _breakdown(report.properties.values()),
+        "by_worker": _breakdown(report.workers.values(), with_cost=False),
+        **_preview_rows(report.rows, shape),
+        "total_records": report.records_count,
+        "limit": limit,
+        "offset": offset
+    })
 
 
 @router.get("/export")
-async def export_report(
+def export_report(
     start_date: date,
     end_date: date,
     property_id: Optional[int] = None,
     cleanup_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_reports_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Export report to Excel (admin only)."""
-    query = db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(
-        TimeRecord.work_date >= start_date,
-        TimeRecord.work_date <= end_date,
-        TimeRecord.total_minutes.isnot(None)
-    )
-    
     property_name = "All Properties"
     if property_id:
-        query = query.filter(TimeRecord.property_id == property_id)
-        prop = db.query(Property).filter(Property.id == property_id).first()
+        prop = dimension_cache.get_property(db, property_id)
         if prop:
             property_name = prop.name
     
-    records = query.order_by(TimeRecord.work_date.desc()).all()
+    records = load_report_rows(db, start_date, end_date, property_id, cleanup_type)
     
-    # Filter by cleanup type
     if cleanup_type == "spring":
-        records = [r for r in records if r.property.is_spring_cleanup]
         property_name += " (Spring Cleanup)"
     elif cleanup_type == "fall":
-        records = [r for r in records if r.property.is_fall_cleanup]
         property_name += " (Fall Cleanup)"
     
     # Generate Excel
@@ -238,3 +257,121 @@ async def export_report(
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
+
+
+@router.get("/export-bundle")
+def export_report_bundle(
+    start_date: date,
+    end_date: date,
+    cleanup_type: Optional[str] = None,
+    db: Session = Depends(get_reports_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Export one Excel workbook per property as a ZIP (admin only)."""
+    # Fetch everything up front; the session is closed before streaming starts
+    records = load_report_rows(db, start_date, end_date, None, cleanup_type)
+    
+    suffix = ""
+    if cleanup_type == "spring":
+        suffix = " (Spring Cleanup)"
+    elif cleanup_type == "fall":
+        suffix = " (Fall Cleanup)"
+    
+    filename = f"dc_landscaping_reports_{start_date}_{end_date}.zip"
+    
+    return StreamingResponse(
+        stream_bundle(group_by_property(records), start_date, end_date, suffix),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get("/overlaps")
+def get_overlaps(
+    start_date: date,
+    end_date: date,
+    db: Session = Depends(get_reports_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Workers booked on two overlapping records in the range (admin only)."""
+    pairs = find_existing_overlaps(db, start_date, end_date)
+    workers = dimension_cache.workers(db)
+    
+    result = []
+    for pair in pairs:
+        worker = workers.get(pair.worker_id)
+        result.append({
+            "worker_id": pair.worker_id,
+            "worker": worker.name if worker else "",
+            "date": pair.work_date.isoformat(),
+            "minutes": pair.minutes,
+            "records": [
+                {
+                    "id": booking.record_id,
+                    "start_time": booking.start_time.strftime("%H:%M"),
+                    "end_time": booking.end_time.strftime("%H:%M") if booking.end_time else None,
+                }
+                for booking in (pair.first, pair.second)
+            ],
+        })
+    
+    return ORJSONResponse({"overlaps": result, "count": len(result)})
+
+
+@router.get("/analytics")
+def get_analytics(
+    group_by: List[str] = Query(..., description="One or two of: property, worker, weekday, month, crew_size, start_hour"),
+    metric: str = "hours",  # hours, cost, records or avg_hours
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    property_id: Optional[int] = None,
+    worker_id: Optional[int] = None,
+    db: Session = Depends(get_db),  # only for worker/property names, usually cached
+    current_user: User = Depends(get_current_admin)
+):
+    """Group closed records from the analytics snapshot (admin only).
+
+    Answers from memory-mapped arrays without querying time records, so
+    results are as of the last refresh_analytics.py run.
+    """
+    # The analytics module needs numpy, which is slow to import, so it is
+    # loaded on the first analytics request rather than at startup
+    from app.services.analytics import WEEKDAYS, AnalyticsError, load_snapshot, month_label
+
+    snapshot = load_snapshot(settings.ANALYTICS_SNAPSHOT_DIR)
+    if snapshot is None:
+        raise HTTPException(
+            status_code=503,
+            detail="The analytics snapshot hasn't been built yet. Run python refresh_analytics.py",
+        )
+    
+    mask = snapshot.mask(start_date, end_date, property_id, worker_id)
+    try:
+        rows = snapshot.aggregate(group_by, metric, mask)
+    except AnalyticsError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    
+    properties = dimension_cache.properties(db) if "property" in group_by else {}
+    workers = dimension_cache.workers(db) if "worker" in group_by else {}
+    for row in rows:
+        if "property" in row:
+            prop = properties.get(row["property"])
+            row["property_name"] = prop.name if prop else ""
+        if "worker" in row:
+            worker = workers.get(row["worker"])
+            row["worker_name"] = worker.name if worker else ""
+        if "weekday" in row:
+            row["weekday"] = WEEKDAYS[row["weekday"]]
+        if "month" in row:
+            row["month"] = month_label(row["month"])
+    
+    return ORJSONResponse({
+        "group_by": group_by,
+        "metric": metric,
+        "rows": rows,
+        "snapshot": {
+            "records": len(snapshot),
+            "built_at": snapshot.meta["built_at"],
+            "refreshed_at": snapshot.meta["refreshed_at"],
+        },
+    })
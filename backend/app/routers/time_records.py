@@ -1,32 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Header, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
-from typing import List, Optional
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Iterable, List, Literal, Optional, Union
 from datetime import date, datetime, time
 
 from app.database import get_db
 from app.models.time_record import TimeRecord
 from app.models.worker import Worker
-from app.models.property import Property
 from app.models.user import User, UserRole
 from app.schemas.time_record import (
     TimeRecordCreate, TimeRecordUpdate, TimeRecordResponse,
-    TimerStart, TimerStop
+    NormalizedTimeRecords, TimeRecordSearchPage, NormalizedTimeRecordSearchPage,
+    TimerStart, TimerStop, TimerEventBatch, TimerEventOutcome
 )
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_admin
+from app.responses import ORJSONResponse
+from app.services.serialization import serialize_time_records, serialize_time_records_normalized
+from app.services.importer import TimesheetFormatError, read_timesheet, import_timesheet_rows
+from app.services.dimensions import dimension_cache, attach_workers
+from app.services.timer_events import apply_timer_events
+from app.services.overlaps import OverlapError, check_overlaps
+from app.services.search import search_notes
+from app.services.statements import archived_records_by_ids, record_by_id, records_by_ids, records_on
 
 router = APIRouter(prefix="/time-records", tags=["Time Records"])
 
 
-@router.get("", response_model=List[TimeRecordResponse])
+def _check_property(db: Session, property_id: int):
+    if dimension_cache.get_property(db, property_id) is None:
+        raise HTTPException(status_code=404, detail="Property not found")
+
+
+def _resolve_workers(db: Session, worker_ids: List[int]) -> List[Worker]:
+    """Workers for the ids: checked against the dimension cache, rates from the database."""
+    infos = dimension_cache.get_workers(db, worker_ids)
+    workers = attach_workers(db, infos) if infos is not None else None
+    if workers is None:
+        raise HTTPException(status_code=404, detail="One or more workers not found")
+    return workers
+
+
+# "full" embeds each record's workers and property; "normalized" sends
+# them once, keyed by id, and records carry worker_ids and property_id
+Shape = Literal["full", "normalized"]
+
+
+def _etag(record: TimeRecord) -> str:
+    return f'"{record.version}"'
+
+
+def _matches(if_match: Optional[str], record: TimeRecord) -> bool:
+    """Whether an If-Match header allows changing the record."""
+    if if_match is None or if_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_match.split(",")]
+    return _etag(record) in tags
+
+
+def _current_state(db: Session, record_id: int, status_code: int, detail: str) -> ORJSONResponse:
+    """Error response carrying the record as it is now, so the client can merge."""
+    db.rollback()
+    record = record_by_id(db, record_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Time record not found")
+    return ORJSONResponse(
+        {"detail": detail, "current": serialize_time_records([record])[0]},
+        status_code=status_code,
+        headers={"ETag": _etag(record)},
+    )
+
+
+def _precondition_failed(db: Session, record: TimeRecord) -> ORJSONResponse:
+    return _current_state(db, record.id, 412, "The record has changed since you loaded it")
+
+
+def _conflict(db: Session, record_id: int) -> ORJSONResponse:
+    return _current_state(db, record_id, 409, "The record was changed by someone else at the same time")
+
+
+def _check_overlaps(db: Session, record: TimeRecord, worker_ids: Iterable[int]):
+    """409 if one of the workers is on another record overlapping this one."""
+    try:
+        check_overlaps(db, worker_ids, record.work_date, record.start_time, record.end_time, record.id)
+    except OverlapError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("", response_model=Union[List[TimeRecordResponse], NormalizedTimeRecords])
 async def get_time_records(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     property_id: Optional[int] = None,
     worker_id: Optional[int] = None,
+    shape: Shape = "full",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get time records with optional filters."""
+    """Get time records with optional filters.
+
+    With shape=normalized the response is {records, workers, properties}
+    instead of a list.
+    """
     query = db.query(TimeRecord).options(
         joinedload(TimeRecord.workers),
         joinedload(TimeRecord.property)
@@ -41,57 +116,85 @@ async def get_time_records(
     if worker_id:
         query = query.filter(TimeRecord.workers.any(Worker.id == worker_id))
     
-    return query.order_by(TimeRecord.work_date.desc(), TimeRecord.start_time.desc()).all()
+    records = query.order_by(TimeRecord.work_date.desc(), TimeRecord.start_time.desc()).all()
+    if shape == "normalized":
+        return ORJSONResponse(serialize_time_records_normalized(records))
+    return ORJSONResponse(serialize_time_records(records))
 
 
-@router.get("/today", response_model=List[TimeRecordResponse])
+@router.get("/today", response_model=Union[List[TimeRecordResponse], NormalizedTimeRecords])
 async def get_today_records(
+    shape: Shape = "full",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get today's time records."""
+    """Get today's time records (shape as for the record list)."""
     today = date.today()
-    return db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(
-        TimeRecord.work_date == today
-    ).order_by(TimeRecord.start_time.desc()).all()
+    records = records_on(db, today)
+    if shape == "normalized":
+        return ORJSONResponse(serialize_time_records_normalized(records))
+    return ORJSONResponse(serialize_time_records(records))
+
+
+@router.get("/search", response_model=Union[TimeRecordSearchPage, NormalizedTimeRecordSearchPage])
+async def search_time_records(
+    q: str = Query(..., min_length=1, max_length=200),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    property_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    shape: Shape = "full",
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Full-text search on notes, best matches first, one page at a time.
+
+    Archived records are included when start_date reaches the archive (or
+    there is no start_date).
+    """
+    total, ids = search_notes(db, q, start_date, end_date, property_id, limit, offset)
+    records = records_by_ids(db, ids) if ids else []
+    if len(records) < len(ids):
+        # The rest of the page is archived
+        found = {r.id for r in records}
+        records += archived_records_by_ids(db, [i for i in ids if i not in found])
+    position = {record_id: i for i, record_id in enumerate(ids)}
+    records.sort(key=lambda r: position[r.id])
+    page = {"total": total, "limit": limit, "offset": offset}
+    if shape == "normalized":
+        page.update(serialize_time_records_normalized(records))
+    else:
+        page["records"] = serialize_time_records(records)
+    return ORJSONResponse(page)
 
 
 @router.get("/{record_id}", response_model=TimeRecordResponse)
 async def get_time_record(
     record_id: int,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific time record."""
-    record = db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(TimeRecord.id == record_id).first()
+    """Get a specific time record. The ETag is its version."""
+    record = record_by_id(db, record_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Time record not found")
+    response.headers["ETag"] = _etag(record)
     return record
 
 
 @router.post("", response_model=TimeRecordResponse, status_code=status.HTTP_201_CREATED)
 async def create_time_record(
     record_data: TimeRecordCreate,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a new time record (manual entry)."""
-    # Verify property exists
-    property = db.query(Property).filter(Property.id == record_data.property_id).first()
-    if not property:
-        raise HTTPException(status_code=404, detail="Property not found")
-    
-    # Get workers
-    workers = db.query(Worker).filter(Worker.id.in_(record_data.worker_ids)).all()
-    if len(workers) != len(record_data.worker_ids):
-        raise HTTPException(status_code=404, detail="One or more workers not found")
+    _check_property(db, record_data.property_id)
+    workers = _resolve_workers(db, record_data.worker_ids)
     
     # Create record
     record = TimeRecord(
@@ -104,6 +207,7 @@ async def create_time_record(
         notes=record_data.notes,
     )
     record.workers = workers
+    _check_overlaps(db, record, record_data.worker_ids)
     
     # Calculate totals if end_time is provided
     if record.end_time:
@@ -113,28 +217,20 @@ async def create_time_record(
     db.commit()
     db.refresh(record)
     
-    return db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(TimeRecord.id == record.id).first()
+    response.headers["ETag"] = _etag(record)
+    return record_by_id(db, record.id)
 
 
 @router.post("/start", response_model=TimeRecordResponse, status_code=status.HTTP_201_CREATED)
 async def start_timer(
     timer_data: TimerStart,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Start a new timer."""
-    # Verify property exists
-    property = db.query(Property).filter(Property.id == timer_data.property_id).first()
-    if not property:
-        raise HTTPException(status_code=404, detail="Property not found")
-    
-    # Get workers
-    workers = db.query(Worker).filter(Worker.id.in_(timer_data.worker_ids)).all()
-    if len(workers) != len(timer_data.worker_ids):
-        raise HTTPException(status_code=404, detail="One or more workers not found")
+    _check_property(db, timer_data.property_id)
+    workers = _resolve_workers(db, timer_data.worker_ids)
     
     # Create record with current time
     now = datetime.now()
@@ -145,65 +241,112 @@ async def start_timer(
         is_manual_entry=False,
     )
     record.workers = workers
+    _check_overlaps(db, record, timer_data.worker_ids)
     
     db.add(record)
     db.commit()
     db.refresh(record)
     
-    return db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(TimeRecord.id == record.id).first()
+    response.headers["ETag"] = _etag(record)
+    return record_by_id(db, record.id)
 
 
 @router.post("/stop", response_model=TimeRecordResponse)
 async def stop_timer(
     timer_data: TimerStop,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Stop an active timer."""
-    record = db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(TimeRecord.id == timer_data.time_record_id).first()
+    """Stop an active timer.
+
+    Two devices stopping the same timer at once: the first wins and the
+    second gets 409 with the stopped record.
+    """
+    record = record_by_id(db, timer_data.time_record_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Time record not found")
     
     if record.end_time:
         raise HTTPException(status_code=400, detail="Timer already stopped")
+    if not _matches(if_match, record):
+        return _precondition_failed(db, record)
     
     # Update end time
     record.end_time = timer_data.end_time or datetime.now().time()
     record.break_minutes = timer_data.break_minutes
     
-    # Update workers if provided
+    # Update workers if provided. Stopping only shortens the record, so
+    # just workers joining it can overlap anything.
     if timer_data.worker_ids:
-        workers = db.query(Worker).filter(Worker.id.in_(timer_data.worker_ids)).all()
-        record.workers = workers
+        joining = set(timer_data.worker_ids) - {w.id for w in record.workers}
+        record.replace_workers(_resolve_workers(db, timer_data.worker_ids))
+        _check_overlaps(db, record, joining)
     
     # Calculate totals
     record.calculate_totals(record.workers)
     
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        return _conflict(db, timer_data.time_record_id)
     db.refresh(record)
     
+    response.headers["ETag"] = _etag(record)
     return record
 
 
+@router.post("/events", response_model=List[TimerEventOutcome])
+async def replay_timer_events(
+    batch: TimerEventBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Apply timer events queued offline, in order, in one transaction.
+
+    Returns one outcome per event: applied, duplicate, conflict or rejected.
+    """
+    return await run_in_threadpool(apply_timer_events, db, current_user, batch.events)
+
+
+@router.post("/import")
+async def import_time_records(
+    file: UploadFile = File(...),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Bulk import historical timesheets from XLSX or CSV (admin only).
+
+    Returns import counts, throughput and a per-row error report.
+    """
+    try:
+        rows = read_timesheet(file.file, file.filename or "")
+        # Parsing and inserting are blocking; keep them off the event loop
+        result = await run_in_threadpool(import_timesheet_rows, db, rows, batch_size)
+    except TimesheetFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return result.as_dict()
+
+
 @router.put("/{record_id}", response_model=TimeRecordResponse)
 async def update_time_record(
     record_id: int,
     record_data: TimeRecordUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Update a time record. Worker can only edit today's records."""
-    record = db.query(TimeRecord).options(
-        joinedload(TimeRecord.workers),
-        joinedload(TimeRecord.property)
-    ).filter(TimeRecord.id == record_id).first()
+    """Update a time record. Worker can only edit today's records.
+
+    With If-Match, the update only applies to that version (412 with the
+    current record otherwise). Without it, a concurrent update still
+    makes this one fail with 409 instead of silently overwriting it.
+    """
+    record = record_by_id(db, record_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Time record not found")
@@ -215,6 +358,8 @@ async def update_time_record(
                 status_code=403, 
                 detail="You can only edit today's records"
             )
+    if not _matches(if_match, record):
+        return _precondition_failed(db, record)
     
     # Update fields
     update_data = record_data.model_dump(exclude_unset=True)
@@ -222,30 +367,39 @@ async def update_time_record(
     # Handle worker_ids separately
     worker_ids = update_data.pop("worker_ids", None)
     if worker_ids is not None:
-        workers = db.query(Worker).filter(Worker.id.in_(worker_ids)).all()
-        record.workers = workers
+        record.replace_workers(_resolve_workers(db, worker_ids))
+    if update_data.get("property_id") is not None:
+        _check_property(db, update_data["property_id"])
     
     for field, value in update_data.items():
         setattr(record, field, value)
     
+    if worker_ids is not None or update_data.keys() & {"work_date", "start_time", "end_time"}:
+        _check_overlaps(db, record, [w.id for w in record.workers])
+    
     # Recalculate totals
     if record.end_time:
         record.calculate_totals(record.workers)
     
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        return _conflict(db, record_id)
     db.refresh(record)
     
+    response.headers["ETag"] = _etag(record)
     return record
 
 
 @router.delete("/{record_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_time_record(
     record_id: int,
+    if_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Delete a time record. Worker can only delete today's records."""
-    record = db.query(TimeRecord).filter(TimeRecord.id == record_id).first()
+    record = record_by_id(db, record_id)
     
     if not record:
         raise HTTPException(status_code=404, detail="Time record not found")
@@ -257,7 +411,12 @@ async def delete_time_record(
                 status_code=403,
                 detail="You can only delete today's records"
             )
+    if not _matches(if_match, record):
+        return _precondition_failed(db, record)
     
     db.delete(record)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        return _conflict(db, record_id)
     return None
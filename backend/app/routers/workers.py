@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,6 +6,9 @@ from app.database import get_db
 from app.models.worker import Worker
 from app.models.user import User, UserRole
 from app.schemas.worker import WorkerCreate, WorkerUpdate, WorkerResponse
+from app.services.dimensions import dimension_cache
+from app.services.statements import worker_by_id
+from app.services.search import search
 from app.auth import get_current_user, get_current_admin
 
 router = APIRouter(prefix="/workers", tags=["Workers"])
@@ -24,6 +27,18 @@ async def get_workers(
     return query.order_by(Worker.name).all()
 
 
+@router.get("/search", response_model=List[WorkerResponse])
+async def search_workers(
+    q: str = Query(..., max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    include_inactive: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Typeahead search on name, best matches first."""
+    return search(db, Worker, q, limit, include_inactive)
+
+
 @router.get("/{worker_id}", response_model=WorkerResponse)
 async def get_worker(
     worker_id: int,
@@ -31,7 +46,7 @@ async def get_worker(
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific worker."""
-    worker = db.query(Worker).filter(Worker.id == worker_id).first()
+    worker = worker_by_id(db, worker_id)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     return worker
@@ -55,6 +70,7 @@ async def create_worker(
     )
     db.add(worker)
     db.commit()
+    dimension_cache.invalidate()
     db.refresh(worker)
     return worker
 
@@ -67,7 +83,7 @@ async def update_worker(
     current_user: User = Depends(get_current_user)
 ):
     """Update a worker. Only admin can change hourly_rate."""
-    worker = db.query(Worker).filter(Worker.id == worker_id).first()
+    worker = worker_by_id(db, worker_id)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     
@@ -81,6 +97,7 @@ async def update_worker(
         setattr(worker, field, value)
     
     db.commit()
+    dimension_cache.invalidate()
     db.refresh(worker)
     return worker
 
@@ -92,10 +109,11 @@ async def delete_worker(
     current_user: User = Depends(get_current_admin)
 ):
     """Delete a worker (admin only). Actually just deactivates."""
-    worker = db.query(Worker).filter(Worker.id == worker_id).first()
+    worker = worker_by_id(db, worker_id)
     if not worker:
         raise HTTPException(status_code=404, detail="Worker not found")
     
     worker.is_active = False
     db.commit()
+    dimension_cache.invalidate()
     return None
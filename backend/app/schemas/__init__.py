@@ -11,7 +11,10 @@ from app.schemas.property import (
 from app.schemas.time_record import (
     TimeRecordBase, TimeRecordCreate, TimeRecordUpdate, 
     TimeRecordResponse, TimeRecordWithDetails,
-    TimerStart, TimerStop
+    NormalizedTimeRecord, NormalizedTimeRecords,
+    TimeRecordSearchPage, NormalizedTimeRecordSearchPage,
+    TimerStart, TimerStop,
+    TimerEventIn, TimerEventBatch, TimerEventOutcome
 )
 
 __all__ = [
@@ -21,5 +24,8 @@ __all__ = [
     "PropertyBase", "PropertyCreate", "PropertyUpdate", "PropertyResponse",
     "TimeRecordBase", "TimeRecordCreate", "TimeRecordUpdate", 
     "TimeRecordResponse", "TimeRecordWithDetails",
+    "NormalizedTimeRecord", "NormalizedTimeRecords",
+    "TimeRecordSearchPage", "NormalizedTimeRecordSearchPage",
     "TimerStart", "TimerStop",
+    "TimerEventIn", "TimerEventBatch", "TimerEventOutcome",
 ]
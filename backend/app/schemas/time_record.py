@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import date, time
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List, Literal
+from datetime import date, datetime, time
 from decimal import Decimal
 
 from app.schemas.worker import WorkerResponse
@@ -33,6 +33,8 @@ class TimeRecordUpdate(BaseModel):
 
 class TimeRecordResponse(TimeRecordBase):
     id: int
+    # Also sent as the ETag; send it back in If-Match to update safely
+    version: int = 1
     total_minutes: Optional[int] = None
     total_cost: Optional[Decimal] = None
     workers: List[WorkerResponse] = []
@@ -42,6 +44,35 @@ class TimeRecordResponse(TimeRecordBase):
         from_attributes = True
 
 
+class NormalizedTimeRecord(TimeRecordBase):
+    """A record in the normalized shape: worker ids instead of workers."""
+    id: int
+    version: int = 1
+    total_minutes: Optional[int] = None
+    total_cost: Optional[Decimal] = None
+    worker_ids: List[int] = []
+
+
+class NormalizedTimeRecords(BaseModel):
+    """?shape=normalized: each worker and property once, keyed by id."""
+    records: List[NormalizedTimeRecord]
+    workers: Dict[str, WorkerResponse]
+    properties: Dict[str, PropertyResponse]
+
+
+class TimeRecordSearchPage(BaseModel):
+    total: int
+    limit: int
+    offset: int
+    records: List[TimeRecordResponse]
+
+
+class NormalizedTimeRecordSearchPage(NormalizedTimeRecords):
+    total: int
+    limit: int
+    offset: int
+
+
 class TimeRecordWithDetails(TimeRecordResponse):
     """Extended response with property details."""
     pass
@@ -58,3 +89,29 @@ class TimerStop(BaseModel):
     end_time: Optional[time] = None
     break_minutes: int = 0
     worker_ids: Optional[List[int]] = None
+
+
+# Offline timer events, replayed in order by POST /time-records/events
+class TimerEventIn(BaseModel):
+    event_id: str = Field(min_length=1, max_length=64)
+    type: Literal["start", "stop", "edit"]
+    occurred_at: datetime
+    # stop/edit target: a server record id, or the event_id of the start
+    # event that created it (for timers started while offline)
+    time_record_id: Optional[int] = None
+    start_event_id: Optional[str] = None
+    property_id: Optional[int] = None
+    worker_ids: Optional[List[int]] = None
+    break_minutes: Optional[int] = Field(default=None, ge=0)
+    notes: Optional[str] = Field(default=None, max_length=500)
+
+
+class TimerEventBatch(BaseModel):
+    events: List[TimerEventIn] = Field(max_length=500)
+
+
+class TimerEventOutcome(BaseModel):
+    event_id: str
+    status: Literal["applied", "duplicate", "conflict", "rejected"]
+    time_record_id: Optional[int] = None
+    detail: Optional[str] = None
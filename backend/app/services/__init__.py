@@ -1,3 +1,24 @@
 from app.services.excel import create_report_excel
+from app.services.dimensions import dimension_cache, DimensionCache, WorkerInfo, PropertyInfo
+from app.services.reporting import Breakdown, Report, ReportRow, load_report_rows, run_report
+from app.services.serialization import (
+    serialize_time_records,
+    serialize_time_records_normalized,
+    time_record_list_adapter,
+)
 
-__all__ = ["create_report_excel"]
+__all__ = [
+    "create_report_excel",
+    "dimension_cache",
+    "DimensionCache",
+    "WorkerInfo",
+    "PropertyInfo",
+    "Breakdown",
+    "Report",
+    "ReportRow",
+    "load_report_rows",
+    "run_report",
+    "serialize_time_records",
+    "serialize_time_records_normalized",
+    "time_record_list_adapter",
+]
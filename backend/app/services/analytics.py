@@ -0,0 +1,408 @@
+"""Columnar snapshot of closed time records for ad-hoc analysis.
+
+Each column is a flat binary file of one NumPy dtype, memory-mapped when
+read, so every server process shares the same pages and a query never
+touches the database. Crews are stored CSR-style: the workers of record
+`i` are `worker_ids[worker_offsets[i]:worker_offsets[i + 1]]`.
+
+`current.json` names the generation directory in use and how many
+records it holds. Readers map only that many, so an append in progress
+(or one that died halfway) is invisible until the pointer moves.
+
+Refreshing appends records closed since the last run: new ids, plus
+timers that were still running last time. Edits and deletes of records
+already in the snapshot only show up after a full rebuild, which
+`refresh_snapshot` does when the current generation is older than
+ANALYTICS_FULL_REBUILD_HOURS. Run it from cron: python refresh_analytics.py
+"""
+import json
+import os
+import shutil
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedTimeRecord, time_record_workers_archive
+from app.models.time_record import TimeRecord, time_record_workers
+
+EPOCH = date(1970, 1, 1)
+
+# Per-record columns; worker_offsets has one extra leading 0
+RECORD_COLUMNS = {
+    "id": np.int64,
+    "day": np.int32,  # days since 1970-01-01
+    "property_id": np.int32,
+    "minutes": np.int32,
+    "cost": np.float64,
+    "crew": np.int16,
+    "start_minute": np.int16,  # minutes after midnight
+}
+LINK_COLUMNS = {
+    "worker_offsets": np.int64,
+    "worker_ids": np.int32,
+}
+
+GROUP_KEYS = ("property", "worker", "weekday", "month", "crew_size", "start_hour")
+METRICS = ("hours", "cost", "records", "avg_hours")
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+POINTER = "current.json"
+FLUSH_EVERY = 20000
+
+
+class AnalyticsError(ValueError):
+    """The query can't be answered from the snapshot."""
+
+
+def _day(value: date) -> int:
+    return (value - EPOCH).days
+
+
+def _read_pointer(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, POINTER)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(directory: str, meta: dict):
+    tmp = os.path.join(directory, POINTER + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(directory, POINTER))
+
+
+# --- Writing ---------------------------------------------------------------
+
+class SnapshotWriter:
+    """Appends records to a generation's column files.
+
+    Starts from `count` records and `links` crew entries. Anything past
+    that in the files is left over from an interrupted run and is cut off.
+    """
+
+    def __init__(self, path: str, count: int = 0, links: int = 0):
+        self.path = path
+        self.count = count
+        self.links = links
+        os.makedirs(path, exist_ok=True)
+        lengths = {name: count for name in RECORD_COLUMNS}
+        lengths["worker_offsets"] = count + 1
+        lengths["worker_ids"] = links
+        for name, dtype in {**RECORD_COLUMNS, **LINK_COLUMNS}.items():
+            with open(self._file(name), "ab") as f:
+                # Also writes the leading 0 offset of a new generation
+                f.truncate(lengths[name] * np.dtype(dtype).itemsize)
+        self._pending: Dict[str, list] = {name: [] for name in RECORD_COLUMNS}
+        self._crews: List[int] = []
+        self._crew_sizes: List[int] = []
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def add(self, record_id: int, work_date: date, property_id: int, minutes: int, cost, start_time: time,
+            worker_ids: Sequence[int]):
+        pending = self._pending
+        pending["id"].append(record_id)
+        pending["day"].append(_day(work_date))
+        pending["property_id"].append(property_id)
+        pending["minutes"].append(minutes or 0)
+        pending["cost"].append(float(cost or 0))
+        pending["crew"].append(len(worker_ids))
+        pending["start_minute"].append(start_time.hour * 60 + start_time.minute)
+        self._crews.extend(worker_ids)
+        self._crew_sizes.append(len(worker_ids))
+        if len(self._crew_sizes) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self._crew_sizes:
+            return
+        for name, dtype in RECORD_COLUMNS.items():
+            with open(self._file(name), "ab") as f:
+                np.asarray(self._pending[name], dtype=dtype).tofile(f)
+            self._pending[name].clear()
+        offsets = self.links + np.cumsum(self._crew_sizes, dtype=np.int64)
+        with open(self._file("worker_offsets"), "ab") as f:
+            offsets.tofile(f)
+        with open(self._file("worker_ids"), "ab") as f:
+            np.asarray(self._crews, dtype=np.int32).tofile(f)
+        self.count += len(self._crew_sizes)
+        self.links += len(self._crews)
+        self._crews.clear()
+        self._crew_sizes.clear()
+        for name in (*RECORD_COLUMNS, *LINK_COLUMNS):
+            with open(self._file(name), "ab") as f:
+                os.fsync(f.fileno())
+
+
+def _select_records(records, links, where):
+    r = records.__table__
+    return (
+        select(
+            r.c.id, r.c.work_date, r.c.property_id, r.c.total_minutes, r.c.total_cost,
+            r.c.start_time, r.c.end_time, links.c.worker_id,
+        )
+        .select_from(r.outerjoin(links, links.c.time_record_id == r.c.id))
+        .where(*where)
+        .order_by(r.c.id, links.c.worker_id)
+        .execution_options(yield_per=FLUSH_EVERY)
+    )
+
+
+def _copy_records(db: Session, writer: SnapshotWriter, stmt) -> Tuple[int, List[int]]:
+    """Write the closed records of `stmt`; return the highest id seen and the open ones."""
+    max_id = 0
+    still_open: List[int] = []
+    seen = None
+    current = None
+    crew: List[int] = []
+
+    def emit():
+        if current is not None:
+            writer.add(*current, crew)
+
+    for record_id, work_date, property_id, minutes, cost, start_time, end_time, worker_id in db.execute(stmt):
+        if record_id != seen:
+            emit()
+            seen, crew = record_id, []
+            max_id = max(max_id, record_id)
+            if end_time is None:
+                still_open.append(record_id)
+                current = None
+            else:
+                current = (record_id, work_date, property_id, minutes, cost, start_time)
+        if worker_id is not None and current is not None:
+            crew.append(worker_id)
+    emit()
+    writer.flush()
+    return max_id, still_open
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def rebuild_snapshot(db: Session, directory: str) -> dict:
+    """Write a new generation from scratch and point readers at it."""
+    generation = datetime.now().strftime("gen-%Y%m%dT%H%M%S%f")
+    writer = SnapshotWriter(os.path.join(directory, generation))
+    _copy_records(db, writer, _select_records(ArchivedTimeRecord, time_record_workers_archive, []))
+    max_id, still_open = _copy_records(db, writer, _select_records(TimeRecord, time_record_workers, []))
+
+    previous = _read_pointer(directory)
+    meta = {
+        "generation": generation,
+        "count": writer.count,
+        "links": writer.links,
+        "max_id": max_id,
+        "open_ids": still_open,
+        "built_at": _now(),
+        "refreshed_at": _now(),
+    }
+    write_pointer(directory, meta)
+    if previous:
+        # Processes still mapping the old files keep them until they reload
+        shutil.rmtree(os.path.join(directory, previous["generation"]), ignore_errors=True)
+    return meta
+
+
+def append_snapshot(db: Session, directory: str, meta: dict) -> dict:
+    """Add records closed since the last refresh to the current generation."""
+    writer = SnapshotWriter(os.path.join(directory, meta["generation"]), meta["count"], meta["links"])
+    r = TimeRecord.__table__
+    where = [r.c.id > meta["max_id"]]
+    if meta["open_ids"]:
+        where = [(r.c.id > meta["max_id"]) | r.c.id.in_(meta["open_ids"])]
+    max_id, still_open = _copy_records(db, writer, _select_records(TimeRecord, time_record_workers, where))
+
+    meta = dict(
+        meta,
+        count=writer.count,
+        links=writer.links,
+        max_id=max(meta["max_id"], max_id),
+        open_ids=still_open,
+        refreshed_at=_now(),
+    )
+    write_pointer(directory, meta)
+    return meta
+
+
+def refresh_snapshot(db: Session, directory: str, full_rebuild_hours: float = 24, full: bool = False) -> dict:
+    """Append new records, or rebuild if asked or the generation is too old.
+
+    Holds a file lock, so overlapping runs wait for each other.
+    """
+    # POSIX only; imported here so the module still loads elsewhere
+    import fcntl
+
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        meta = _read_pointer(directory)
+        if (
+            full
+            or meta is None
+            or datetime.now() - datetime.fromisoformat(meta["built_at"]) >= timedelta(hours=full_rebuild_hours)
+        ):
+            return rebuild_snapshot(db, directory)
+        return append_snapshot(db, directory, meta)
+
+
+# --- Reading ---------------------------------------------------------------
+
+def _map(path: str, dtype, length: int) -> np.ndarray:
+    if length == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(length,))
+
+
+class AnalyticsSnapshot:
+    """Read-only view of one generation, as memory-mapped arrays."""
+
+    def __init__(self, directory: str, meta: dict):
+        self.meta = meta
+        path = os.path.join(directory, meta["generation"])
+        count = meta["count"]
+        for name, dtype in RECORD_COLUMNS.items():
+            setattr(self, name, _map(os.path.join(path, f"{name}.bin"), dtype, count))
+        self.worker_offsets = _map(os.path.join(path, "worker_offsets.bin"), np.int64, count + 1)
+        self.worker_ids = _map(os.path.join(path, "worker_ids.bin"), np.int32, meta["links"])
+
+    def __len__(self) -> int:
+        return self.meta["count"]
+
+    def records_with_worker(self, worker_id: int) -> np.ndarray:
+        """Indexes of the records whose crew includes the worker."""
+        positions = np.flatnonzero(self.worker_ids == worker_id)
+        return np.searchsorted(self.worker_offsets, positions, side="right") - 1
+
+    def mask(
+        self,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        property_id: Optional[int] = None,
+        worker_id: Optional[int] = None,
+    ) -> np.ndarray:
+        keep = np.ones(len(self), dtype=bool)
+        if start_date is not None:
+            keep &= self.day >= _day(start_date)
+        if end_date is not None:
+            keep &= self.day <= _day(end_date)
+        if property_id is not None:
+            keep &= self.property_id == property_id
+        if worker_id is not None:
+            with_worker = np.zeros(len(self), dtype=bool)
+            with_worker[self.records_with_worker(worker_id)] = True
+            keep &= with_worker
+        return keep
+
+    def _by_worker(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """One (record index, worker id) pair per crew member of `rows`."""
+        starts = self.worker_offsets[rows]
+        sizes = self.worker_offsets[rows + 1] - starts
+        firsts = np.cumsum(sizes) - sizes
+        positions = np.arange(sizes.sum()) - np.repeat(firsts, sizes) + np.repeat(starts, sizes)
+        return np.repeat(rows, sizes), self.worker_ids[positions].astype(np.int64)
+
+    def _key(self, name: str, rows: np.ndarray, workers: Optional[np.ndarray]) -> Tuple[np.ndarray, int, int]:
+        """Non-negative int key per row for bincount, its size and offset."""
+        if name == "weekday":
+            # 1970-01-01 was a Thursday
+            return (self.day[rows].astype(np.int64) + 3) % 7, 7, 0
+        if name == "start_hour":
+            return self.start_minute[rows].astype(np.int64) // 60, 24, 0
+        if name == "month":
+            values = self.day[rows].astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        elif name == "property":
+            values = self.property_id[rows].astype(np.int64)
+        elif name == "crew_size":
+            values = self.crew[rows].astype(np.int64)
+        else:
+            values = workers
+        if len(values) == 0:
+            return values, 1, 0
+        low = int(values.min())
+        return values - low, int(values.max()) - low + 1, low
+
+    def aggregate(self, group_by: Sequence[str], metric: str, mask: np.ndarray) -> List[dict]:
+        """Group the masked records by up to two keys.
+
+        Each result has the key values (raw ints), the metric as `value` and
+        the number of records in `records`. Grouping by worker counts a
+        record once for each worker on it.
+        """
+        if not 1 <= len(group_by) <= 2 or any(key not in GROUP_KEYS for key in group_by):
+            raise AnalyticsError(f"group_by takes one or two of: {', '.join(GROUP_KEYS)}")
+        if len(set(group_by)) != len(group_by):
+            raise AnalyticsError("group_by keys must differ")
+        if metric not in METRICS:
+            raise AnalyticsError(f"metric must be one of: {', '.join(METRICS)}")
+        if metric == "cost" and "worker" in group_by:
+            raise AnalyticsError("Record costs can't be split by worker")
+
+        rows = np.flatnonzero(mask)
+        workers = None
+        if "worker" in group_by:
+            rows, workers = self._by_worker(rows)
+
+        key = np.zeros(len(rows), dtype=np.int64)
+        sizes, offsets = [], []
+        for name in group_by:
+            part, size, offset = self._key(name, rows, workers)
+            key = key * size + part
+            sizes.append(size)
+            offsets.append(offset)
+        length = int(np.prod(sizes))
+
+        counts = np.bincount(key, minlength=length)
+        if metric == "cost":
+            totals = np.bincount(key, weights=self.cost[rows], minlength=length)
+        else:
+            totals = np.bincount(key, weights=self.minutes[rows], minlength=length) / 60
+
+        results = []
+        for flat in np.flatnonzero(counts):
+            values = np.unravel_index(flat, sizes)
+            row = {name: int(v) + offset for name, v, offset in zip(group_by, values, offsets)}
+            if metric == "records":
+                value = int(counts[flat])
+            elif metric == "avg_hours":
+                value = round(float(totals[flat] / counts[flat]), 2)
+            else:
+                value = round(float(totals[flat]), 2)
+            row.update(value=value, records=int(counts[flat]))
+            results.append(row)
+        return results
+
+
+def month_label(months_since_epoch: int) -> str:
+    return f"{1970 + months_since_epoch // 12}-{months_since_epoch % 12 + 1:02d}"
+
+
+_loaded: Dict[str, AnalyticsSnapshot] = {}
+_load_lock = threading.Lock()
+
+
+def load_snapshot(directory: str) -> Optional[AnalyticsSnapshot]:
+    """The current snapshot, re-mapped when a refresh has moved the pointer."""
+    meta = _read_pointer(directory)
+    if meta is None:
+        return None
+    with _load_lock:
+        snapshot = _loaded.get(directory)
+        if snapshot is None or snapshot.meta != meta:
+            try:
+                snapshot = AnalyticsSnapshot(directory, meta)
+            except FileNotFoundError:
+                # A rebuild replaced the generation between the two reads
+                snapshot = AnalyticsSnapshot(directory, _read_pointer(directory))
+            _loaded[directory] = snapshot
+        return snapshot
@@ -0,0 +1,87 @@
+"""Move closed seasons out of the hot time_records table.
+
+Records of seasons older than the retention window are copied into
+time_records_archive (and their crews into time_record_workers_archive)
+and deleted from the hot tables, one batch per transaction. A run that is
+interrupted loses at most its current batch, and running it again picks
+up where it stopped.
+
+Running timers are never archived.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedTimeRecord, time_record_workers_archive
+from app.models.time_record import TimeRecord, time_record_workers
+
+RECORD_COLUMNS = [
+    "id", "property_id", "work_date", "start_time", "end_time", "break_minutes",
+    "is_manual_entry", "notes", "total_minutes", "total_cost", "version",
+]
+
+
+def archive_cutoff(keep_seasons: int, today: Optional[date] = None) -> date:
+    """First day still kept hot: January 1st of the oldest kept season."""
+    today = today or date.today()
+    return date(today.year - max(keep_seasons, 1) + 1, 1, 1)
+
+
+def count_archivable(db: Session, cutoff: date) -> int:
+    return db.execute(
+        select(func.count(TimeRecord.id)).where(
+            TimeRecord.work_date < cutoff,
+            TimeRecord.end_time.isnot(None),
+        )
+    ).scalar()
+
+
+def archive_records(db: Session, cutoff: date, batch_size: int = 5000, progress=None) -> int:
+    """Archive closed records dated before `cutoff`. Returns the number moved."""
+    moved = 0
+    hot = TimeRecord.__table__
+    archive = ArchivedTimeRecord.__table__
+
+    while True:
+        ids = db.execute(
+            select(TimeRecord.id)
+            .where(TimeRecord.work_date < cutoff, TimeRecord.end_time.isnot(None))
+            .order_by(TimeRecord.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.execute(
+            insert(archive).from_select(
+                RECORD_COLUMNS,
+                select(*[hot.c[name] for name in RECORD_COLUMNS]).where(hot.c.id.in_(ids)),
+            )
+        )
+        db.execute(
+            insert(time_record_workers_archive).from_select(
+                ["time_record_id", "worker_id"],
+                select(time_record_workers.c.time_record_id, time_record_workers.c.worker_id)
+                .where(time_record_workers.c.time_record_id.in_(ids)),
+            )
+        )
+        db.execute(delete(time_record_workers).where(time_record_workers.c.time_record_id.in_(ids)))
+        db.execute(delete(hot).where(hot.c.id.in_(ids)))
+        db.commit()
+
+        moved += len(ids)
+        if progress:
+            progress(moved)
+    return moved
+
+
+def latest_archived_date(db: Session) -> Optional[date]:
+    return db.execute(select(func.max(ArchivedTimeRecord.work_date))).scalar()
+
+
+def archive_reaches(db: Session, start_date: date) -> bool:
+    """Whether a report starting at `start_date` needs archived records."""
+    latest = latest_archived_date(db)
+    return latest is not None and start_date <= latest
@@ -0,0 +1,162 @@
+"""Process-local cache of workers and properties.
+
+There are a few hundred workers and a few thousand properties, and they
+rarely change, so each server process keeps them in memory. Timer
+validation and report rows then resolve ids without a query.
+
+Writes through the workers and properties routers invalidate the cache of
+the process that handled them. Other processes pick up the change when
+their copy expires (DIMENSION_CACHE_TTL_SECONDS). Any of them reloads
+early when asked for an id it doesn't know yet.
+
+A process can hold a stale hourly rate for up to the TTL, so anything
+that saves totals takes the workers from the database (attach_workers),
+not from this cache.
+"""
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app.config import settings
+
+from app.models.property import Property
+from app.models.worker import Worker
+from app.services.statements import workers_by_ids
+
+# Unknown ids trigger a reload at most this often
+MISS_RELOAD_INTERVAL_SECONDS = 1.0
+
+
+class WorkerInfo(NamedTuple):
+    id: int
+    name: str
+    phone: Optional[str]
+    hourly_rate: Decimal
+    is_active: bool
+
+
+class PropertyInfo(NamedTuple):
+    id: int
+    name: str
+    address: Optional[str]
+    is_spring_cleanup: bool
+    is_fall_cleanup: bool
+    is_active: bool
+
+    @property
+    def cleanup_type(self) -> str:
+        if self.is_spring_cleanup:
+            return "Spring"
+        if self.is_fall_cleanup:
+            return "Fall"
+        return ""
+
+
+class DimensionCache:
+    def __init__(self, ttl_seconds: float = 60):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._workers: Dict[int, WorkerInfo] = {}
+        self._properties: Dict[int, PropertyInfo] = {}
+        self._loaded_at = None
+        self._miss_reload_at = 0.0
+
+    def load(self, db: Session):
+        """(Re)load both tables. Readers keep using the old dicts until swapped."""
+        workers = {
+            row.id: WorkerInfo(row.id, row.name, row.phone, row.hourly_rate, bool(row.is_active))
+            for row in db.execute(select(
+                Worker.id, Worker.name, Worker.phone, Worker.hourly_rate, Worker.is_active
+            ))
+        }
+        properties = {
+            row.id: PropertyInfo(
+                row.id, row.name, row.address,
+                bool(row.is_spring_cleanup), bool(row.is_fall_cleanup), bool(row.is_active),
+            )
+            for row in db.execute(select(
+                Property.id, Property.name, Property.address,
+                Property.is_spring_cleanup, Property.is_fall_cleanup, Property.is_active,
+            ))
+        }
+        with self._lock:
+            self._workers = workers
+            self._properties = properties
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_fresh(self, db: Session):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl_seconds:
+            self.load(db)
+
+    def _reload_on_miss(self, db: Session) -> bool:
+        """Reload for an unknown id, unless one just happened."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._miss_reload_at < MISS_RELOAD_INTERVAL_SECONDS:
+                return False
+            self._miss_reload_at = now
+        self.load(db)
+        return True
+
+    def workers(self, db: Session) -> Dict[int, WorkerInfo]:
+        self._ensure_fresh(db)
+        return self._workers
+
+    def properties(self, db: Session) -> Dict[int, PropertyInfo]:
+        self._ensure_fresh(db)
+        return self._properties
+
+    def get_property(self, db: Session, property_id: int) -> Optional[PropertyInfo]:
+        info = self.properties(db).get(property_id)
+        if info is None and self._reload_on_miss(db):
+            info = self._properties.get(property_id)
+        return info
+
+    def get_workers(self, db: Session, worker_ids: Iterable[int]) -> Optional[List[WorkerInfo]]:
+        """Workers for the ids (duplicates dropped), or None if any is unknown."""
+        worker_ids = list(dict.fromkeys(worker_ids))
+        workers = self.workers(db)
+        if any(i not in workers for i in worker_ids):
+            if not self._reload_on_miss(db):
+                return None
+            workers = self._workers
+            if any(i not in workers for i in worker_ids):
+                return None
+        return [workers[i] for i in worker_ids]
+
+
+dimension_cache = DimensionCache(ttl_seconds=settings.DIMENSION_CACHE_TTL_SECONDS)
+
+
+def attach_workers(db: Session, infos: Iterable[WorkerInfo]) -> Optional[List[Worker]]:
+    """Worker objects for ids validated against the cache, read from the database.
+
+    Records saved with these workers store totals computed from their
+    hourly_rate, which must be current even when another process changed
+    it. One primary-key query loads the ones not in the session yet.
+    Returns None if any was deleted since the cache was loaded.
+    """
+    found = {}
+    missing = []
+    for info in infos:
+        worker = db.identity_map.get(identity_key(Worker, info.id))
+        if worker is None:
+            missing.append(info.id)
+        else:
+            found[info.id] = worker
+    if missing:
+        found.update((worker.id, worker) for worker in workers_by_ids(db, missing))
+    workers = [found.get(info.id) for info in infos]
+    if any(worker is None for worker in workers):
+        return None
+    return workers
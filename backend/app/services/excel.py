@@ -1,21 +1,23 @@
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils import get_column_letter
 from io import BytesIO
 from typing import List
 from datetime import date
 from decimal import Decimal
 
-from app.models.time_record import TimeRecord
+from app.services.reporting import ReportRow
 
 
 def create_report_excel(
-    records: List[TimeRecord],
+    records: List[ReportRow],
     start_date: date,
     end_date: date,
     property_name: str = "All Properties"
 ) -> BytesIO:
-    """Create an Excel report from time records."""
+    """Create an Excel report from report rows."""
+    # openpyxl is slow to import, so load it on the first export rather
+    # than when the API process starts.
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+
     wb = Workbook()
     ws = wb.active
     ws.title = "Time Report"
@@ -61,13 +63,6 @@ def create_report_excel(
     
     row = 5
     for record in records:
-        # Determine type
-        cleanup_type = ""
-        if record.property.is_spring_cleanup:
-            cleanup_type = "Spring"
-        elif record.property.is_fall_cleanup:
-            cleanup_type = "Fall"
-        
         # Calculate hours
         hours = Decimal(str(record.total_minutes / 60)) if record.total_minutes else Decimal("0")
         cost = record.total_cost or Decimal("0")
@@ -76,12 +71,12 @@ def create_report_excel(
         total_cost += cost
         
         # Worker names
-        worker_names = ", ".join([w.name for w in record.workers])
+        worker_names = ", ".join(record.worker_names)
         
         data = [
             record.work_date.strftime("%Y-%m-%d"),
-            record.property.name,
-            cleanup_type,
+            record.property_name,
+            record.cleanup_type,
             worker_names,
             float(hours),
             float(cost)
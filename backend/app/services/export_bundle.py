@@ -0,0 +1,139 @@
+"""Season-end export: one workbook per property, streamed as a ZIP.
+
+Report rows are fetched once and grouped by property. The workbooks are
+built in a pool of worker processes, since openpyxl is CPU-bound and
+holds the GIL. Each workbook is written into the ZIP as soon as it is
+ready. At most `max_in_flight` workbooks are queued or held at a time, so
+memory stays bounded however many properties there are.
+"""
+import multiprocessing
+import os
+import re
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.services.excel import create_report_excel
+from app.services.reporting import ReportRow
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def export_processes() -> int:
+    return settings.EXPORT_PROCESSES or min(4, os.cpu_count() or 1)
+
+
+def export_pool() -> ProcessPoolExecutor:
+    """The process pool for workbooks, started on first use.
+
+    Uses spawn so workers don't inherit the server's threads and database
+    connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=export_processes(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool(wait: bool = True):
+    """Stop the pool's workers; the next export starts a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool = None
+
+
+def build_workbook(rows: List[ReportRow], start_date: date, end_date: date, property_name: str) -> bytes:
+    """Run in a pool worker: one property's workbook as bytes."""
+    return create_report_excel(rows, start_date, end_date, property_name).getvalue()
+
+
+def bundle_entry_name(property_id: int, property_name: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", property_name).strip("_") or "property"
+    return f"{safe[:60]}_{property_id}.xlsx"
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def group_by_property(rows: List[ReportRow]) -> Dict[int, List[ReportRow]]:
+    groups: Dict[int, List[ReportRow]] = {}
+    for row in rows:
+        groups.setdefault(row.property_id, []).append(row)
+    return groups
+
+
+def stream_bundle(
+    groups: Dict[int, List[ReportRow]],
+    start_date: date,
+    end_date: date,
+    name_suffix: str = "",
+    max_in_flight: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Yield a ZIP of one workbook per property, in completion order.
+
+    Entries are stored, not deflated: XLSX files are already compressed.
+    """
+    pool = export_pool()
+    max_in_flight = max_in_flight or export_processes() * 2
+    sink = _ChunkSink()
+    timestamp = datetime.now().timetuple()[:6]
+    pending = iter(groups.items())
+    in_flight = {}
+
+    def submit_next() -> bool:
+        try:
+            property_id, rows = next(pending)
+        except StopIteration:
+            return False
+        property_name = rows[0].property_name + name_suffix
+        future = pool.submit(build_workbook, rows, start_date, end_date, property_name)
+        in_flight[future] = bundle_entry_name(property_id, rows[0].property_name)
+        return True
+
+    try:
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as bundle:
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = in_flight.pop(future)
+                    bundle.writestr(zipfile.ZipInfo(name, date_time=timestamp), future.result())
+                    submit_next()
+                yield sink.drain()
+        # Central directory
+        yield sink.drain()
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start fresh next time
+        shutdown_pool(wait=False)
+        raise
+    finally:
+        for future in in_flight:
+            future.cancel()
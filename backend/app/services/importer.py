@@ -0,0 +1,370 @@
+"""Streaming bulk import of historical timesheets from XLSX or CSV.
+
+Rows are read one at a time (openpyxl read-only mode or csv.reader), so
+memory use does not grow with the size of the file. Worker and property
+names are resolved through lookups built once per import. Names that
+aren't known yet are created in one insert per batch. Records and their
+time_record_workers rows are written in batched transactions.
+
+Expected columns (header row, case-insensitive, in any order):
+  date, property, workers, start, end, break, notes
+Workers are separated by commas, semicolons, slashes or "&".
+Rows that would put a worker on two overlapping records, with each other
+or with records already stored, are reported and skipped.
+"""
+import csv
+import io
+import re
+import time as timer
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.property import Property
+from app.models.time_record import TimeRecord, time_record_workers, compute_totals
+from app.models.worker import Worker
+from app.services.dimensions import dimension_cache
+from app.services.overlaps import Booking, bookings_by_day, first_overlap
+
+COLUMN_ALIASES = {
+    "date": "work_date", "work_date": "work_date", "work date": "work_date",
+    "property": "property", "property_name": "property", "property name": "property", "site": "property",
+    "workers": "workers", "worker": "workers", "crew": "workers",
+    "start": "start_time", "start_time": "start_time", "start time": "start_time",
+    "end": "end_time", "end_time": "end_time", "end time": "end_time",
+    "break": "break_minutes", "break_minutes": "break_minutes", "break (min)": "break_minutes",
+    "notes": "notes", "note": "notes",
+}
+REQUIRED_COLUMNS = ("work_date", "property", "workers", "start_time", "end_time")
+COLUMN_LABELS = {"work_date": "date", "start_time": "start", "end_time": "end"}
+
+WORKER_SEPARATORS = re.compile(r"\s*(?:,|;|/|&)\s*")
+
+# Keep the error report bounded on badly formatted files
+MAX_REPORTED_ERRORS = 1000
+
+# Longer names are rejected per row rather than cut to fit the column
+MAX_WORKER_NAME = Worker.name.type.length
+MAX_PROPERTY_NAME = Property.name.type.length
+
+
+class TimesheetFormatError(ValueError):
+    """The file can't be imported at all (bad format or missing columns)."""
+
+
+@dataclass
+class ImportResult:
+    rows_read: int = 0
+    imported: int = 0
+    workers_created: int = 0
+    properties_created: int = 0
+    errors: List[dict] = field(default_factory=list)
+    errors_truncated: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows_read / self.seconds, 1) if self.seconds else 0.0
+
+    def add_error(self, row: int, message: str):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+        else:
+            self.errors_truncated += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "failed": len(self.errors) + self.errors_truncated,
+            "workers_created": self.workers_created,
+            "properties_created": self.properties_created,
+            "seconds": round(self.seconds, 2),
+            "rows_per_second": self.rows_per_second,
+            "errors": self.errors,
+            "errors_truncated": self.errors_truncated,
+        }
+
+
+# --- Reading ---------------------------------------------------------------
+
+def _map_header(header: Iterable) -> List[Optional[str]]:
+    columns = [COLUMN_ALIASES.get(str(h).strip().lower()) if h is not None else None for h in header]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        labels = [COLUMN_LABELS.get(c, c) for c in missing]
+        raise TimesheetFormatError(f"Missing required columns: {', '.join(labels)}")
+    return columns
+
+
+def _rows_to_dicts(rows: Iterator[tuple], first_row: int) -> Iterator[Tuple[int, dict]]:
+    try:
+        header = next(rows)
+    except StopIteration:
+        raise TimesheetFormatError("The file is empty")
+    columns = _map_header(header)
+    for number, values in enumerate(rows, start=first_row + 1):
+        if values is None or all(v is None or str(v).strip() == "" for v in values):
+            continue
+        yield number, {c: v for c, v in zip(columns, values) if c is not None}
+
+
+def read_xlsx(fileobj) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, values) from the first sheet of a workbook."""
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise TimesheetFormatError(f"Not a valid XLSX file: {exc}")
+    try:
+        yield from _rows_to_dicts(workbook.active.iter_rows(values_only=True), first_row=1)
+    finally:
+        workbook.close()
+
+
+def read_csv(textfile) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, values) from a CSV text stream."""
+    yield from _rows_to_dicts(iter(csv.reader(textfile)), first_row=1)
+
+
+def read_timesheet(fileobj, filename: str) -> Iterator[Tuple[int, dict]]:
+    """Pick the reader from the file extension. `fileobj` is binary."""
+    if filename.lower().endswith(".csv"):
+        return read_csv(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return read_xlsx(fileobj)
+    raise TimesheetFormatError("Unsupported file type, expected .xlsx or .csv")
+
+
+# --- Parsing ---------------------------------------------------------------
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", "%d/%m/%Y", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid date: {text!r}")
+
+
+def _parse_time(value, name: str) -> time:
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    if isinstance(value, float) and 0 <= value < 1:
+        # Excel stores times as a fraction of a day
+        minutes = round(value * 24 * 60)
+        return time(minutes // 60, minutes % 60)
+    text = str(value).strip()
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p"):
+        try:
+            return datetime.strptime(text.upper(), fmt).time()
+        except ValueError:
+            pass
+    raise ValueError(f"Invalid {name}: {text!r}")
+
+
+def _parse_names(value) -> List[str]:
+    return [n for n in WORKER_SEPARATORS.split(str(value or "").strip()) if n]
+
+
+def parse_row(values: dict) -> dict:
+    """Validate one row and convert it to typed values."""
+    for column in REQUIRED_COLUMNS:
+        if values.get(column) is None or str(values[column]).strip() == "":
+            raise ValueError(f"Missing {column.replace('_', ' ')}")
+
+    start_time = _parse_time(values["start_time"], "start time")
+    end_time = _parse_time(values["end_time"], "end time")
+    if end_time <= start_time:
+        raise ValueError("End time must be after start time")
+
+    break_value = values.get("break_minutes")
+    try:
+        break_minutes = int(float(break_value)) if break_value not in (None, "") else 0
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid break: {break_value!r}")
+
+    worker_names = _parse_names(values["workers"])
+    if not worker_names:
+        raise ValueError("Missing workers")
+    for name in worker_names:
+        if len(name) > MAX_WORKER_NAME:
+            raise ValueError(f"Worker name longer than {MAX_WORKER_NAME} characters: {name!r}")
+    property_name = str(values["property"]).strip()
+    if len(property_name) > MAX_PROPERTY_NAME:
+        raise ValueError(f"Property name longer than {MAX_PROPERTY_NAME} characters: {property_name!r}")
+
+    notes = values.get("notes")
+    return {
+        "work_date": _parse_date(values["work_date"]),
+        "property": property_name,
+        "workers": worker_names,
+        "start_time": start_time,
+        "end_time": end_time,
+        "break_minutes": break_minutes,
+        "notes": str(notes).strip()[:500] if notes not in (None, "") else None,
+    }
+
+
+# --- Loading ---------------------------------------------------------------
+
+class _Lookups:
+    """Name -> id (and worker rate) maps, built once per import."""
+
+    def __init__(self, db: Session):
+        self.reload(db)
+
+    def reload(self, db: Session):
+        self.workers: Dict[str, Tuple[int, float]] = {}
+        for worker_id, name, rate in db.execute(select(Worker.id, Worker.name, Worker.hourly_rate).order_by(Worker.id)):
+            self.workers.setdefault(name.strip().lower(), (worker_id, rate))
+        self.properties: Dict[str, int] = {}
+        for property_id, name in db.execute(select(Property.id, Property.name).order_by(Property.id)):
+            self.properties.setdefault(name.strip().lower(), property_id)
+
+    def create_missing(self, db: Session, rows: List[dict], result: ImportResult):
+        """Insert unknown workers and properties of a batch in one go each."""
+        new_workers = {}
+        new_properties = {}
+        for row in rows:
+            for name in row["workers"]:
+                if name.lower() not in self.workers:
+                    new_workers.setdefault(name.lower(), name)
+            if row["property"].lower() not in self.properties:
+                new_properties.setdefault(row["property"].lower(), row["property"])
+
+        if new_workers:
+            names = list(new_workers.values())
+            db.execute(insert(Worker), [{"name": n, "is_active": True} for n in names])
+            for worker_id, name, rate in db.execute(
+                select(Worker.id, Worker.name, Worker.hourly_rate).where(Worker.name.in_(names)).order_by(Worker.id)
+            ):
+                self.workers.setdefault(name.strip().lower(), (worker_id, rate))
+            result.workers_created += len(new_workers)
+
+        if new_properties:
+            names = list(new_properties.values())
+            db.execute(insert(Property), [{"name": n, "is_active": True} for n in names])
+            for property_id, name in db.execute(
+                select(Property.id, Property.name).where(Property.name.in_(names)).order_by(Property.id)
+            ):
+                self.properties.setdefault(name.strip().lower(), property_id)
+            result.properties_created += len(new_properties)
+
+
+def _write_batch(db: Session, lookups: _Lookups, batch: List[Tuple[int, dict]], result: ImportResult):
+    rows = [row for _, row in batch]
+    lookups.create_missing(db, rows, result)
+
+    # Bookings already stored for the batch's workers and days, in one query.
+    # Rows accepted below are added so the batch is checked against itself.
+    booked = bookings_by_day(
+        db,
+        (lookups.workers[name.lower()][0] for row in rows for name in row["workers"]),
+        (row["work_date"] for row in rows),
+    )
+
+    records = []
+    crews = []
+    for number, row in batch:
+        crew = [lookups.workers[name.lower()] for name in row["workers"]]
+        worker_ids = list(dict.fromkeys(worker_id for worker_id, _ in crew))
+        clash = None
+        for name in row["workers"]:
+            clash = first_overlap(
+                booked.get((lookups.workers[name.lower()][0], row["work_date"]), []),
+                row["start_time"],
+                row["end_time"],
+            )
+            if clash:
+                other = f"time record {clash.record_id}" if clash.record_id > 0 else f"row {-clash.record_id}"
+                result.add_error(number, f"{name} is already on {other} at that time")
+                break
+        if clash:
+            continue
+        for worker_id in worker_ids:
+            # Negative ids stand for rows of this batch, which have no id yet
+            booked.setdefault((worker_id, row["work_date"]), []).append(
+                Booking(worker_id, -number, row["start_time"], row["end_time"])
+            )
+        total_minutes, total_cost = compute_totals(
+            row["start_time"], row["end_time"], row["break_minutes"], [rate for _, rate in crew]
+        )
+        records.append(TimeRecord(
+            property_id=lookups.properties[row["property"].lower()],
+            work_date=row["work_date"],
+            start_time=row["start_time"],
+            end_time=row["end_time"],
+            break_minutes=row["break_minutes"],
+            is_manual_entry=True,
+            notes=row["notes"],
+            total_minutes=total_minutes,
+            total_cost=total_cost,
+        ))
+        crews.append(worker_ids)
+
+    if records:
+        db.add_all(records)
+        db.flush()
+        db.execute(insert(time_record_workers), [
+            {"time_record_id": record.id, "worker_id": worker_id}
+            for record, worker_ids in zip(records, crews)
+            for worker_id in worker_ids
+        ])
+    db.commit()
+    # Drop the batch from the identity map so memory stays flat
+    db.expunge_all()
+    result.imported += len(records)
+
+
+def import_timesheet_rows(db: Session, rows: Iterable[Tuple[int, dict]], batch_size: int = 1000) -> ImportResult:
+    """Import (row number, values) pairs, committing every `batch_size` rows.
+
+    Rows that fail validation are reported in the result and skipped. A
+    batch that fails to write is rolled back and each of its rows is
+    reported with the database error.
+    """
+    result = ImportResult()
+    started = timer.perf_counter()
+    lookups = _Lookups(db)
+    batch: List[Tuple[int, dict]] = []
+
+    def flush():
+        try:
+            _write_batch(db, lookups, batch, result)
+        except Exception as exc:
+            db.rollback()
+            db.expunge_all()
+            # Names created in the failed batch were rolled back too
+            lookups.reload(db)
+            for number, _ in batch:
+                result.add_error(number, f"Database error: {exc.__class__.__name__}")
+        batch.clear()
+
+    for number, values in rows:
+        result.rows_read += 1
+        try:
+            batch.append((number, parse_row(values)))
+        except ValueError as exc:
+            result.add_error(number, str(exc))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    if result.workers_created or result.properties_created:
+        dimension_cache.invalidate()
+    result.seconds = timer.perf_counter() - started
+    return result
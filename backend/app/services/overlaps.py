@@ -0,0 +1,181 @@
+"""Double-booking checks: one worker on two overlapping records of a day.
+
+Writes are checked as they happen. A record's workers are looked up on
+its work_date through the worker_id and work_date indexes, so a check
+costs one query over that day's records for those workers, however long
+the history is.
+
+Records already in the database are checked by `find_existing_overlaps`.
+It reads the range's (worker, day, interval) rows in start order and
+sweeps each worker's day once, keeping only the intervals still open.
+That finds every pair without a self-join.
+
+Times are half-open, [start, end): a record ending at 12:00 doesn't
+overlap one starting at 12:00. A running timer (no end yet) is treated
+as running to the end of its day.
+"""
+from datetime import date, datetime, time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import lambda_stmt, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedTimeRecord, time_record_workers_archive
+from app.models.time_record import TimeRecord, time_record_workers
+from app.services.archival import archive_reaches
+from app.services.dimensions import dimension_cache
+
+
+class Booking(NamedTuple):
+    worker_id: int
+    record_id: int
+    start_time: time
+    end_time: Optional[time]
+
+
+class OverlapPair(NamedTuple):
+    worker_id: int
+    work_date: date
+    first: Booking
+    second: Booking
+
+    @property
+    def minutes(self) -> int:
+        start = max(self.first.start_time, self.second.start_time)
+        end = min(_end(self.first.end_time), _end(self.second.end_time))
+        delta = datetime.combine(self.work_date, end) - datetime.combine(self.work_date, start)
+        return max(0, round(delta.total_seconds() / 60))
+
+
+class OverlapError(ValueError):
+    """A write would put a worker on two overlapping records."""
+
+    def __init__(self, bookings: List[Booking], db: Session):
+        self.bookings = bookings
+        booking = bookings[0]
+        found = dimension_cache.get_workers(db, [booking.worker_id])
+        name = found[0].name if found else f"Worker {booking.worker_id}"
+        until = booking.end_time.strftime("%H:%M") if booking.end_time else "now (timer running)"
+        super().__init__(
+            f"{name} is already on time record {booking.record_id} "
+            f"from {booking.start_time.strftime('%H:%M')} to {until}"
+        )
+
+
+def _end(end_time: Optional[time]) -> time:
+    return end_time if end_time is not None else time.max
+
+
+def find_overlaps(
+    db: Session,
+    worker_ids: Iterable[int],
+    work_date: date,
+    start_time: time,
+    end_time: Optional[time],
+    exclude_record_id: Optional[int] = None,
+) -> List[Booking]:
+    """Other records of the day that have one of the workers in the interval."""
+    worker_ids = list(set(worker_ids))
+    if not worker_ids or (end_time is not None and end_time <= start_time):
+        return []
+    # Runs on every timer write, so it is a cached lambda statement; the
+    # worker ids are one expanding parameter whatever their number
+    stmt = lambda_stmt(
+        lambda: select(time_record_workers.c.worker_id, TimeRecord.id, TimeRecord.start_time, TimeRecord.end_time)
+        .join_from(time_record_workers, TimeRecord, TimeRecord.id == time_record_workers.c.time_record_id)
+        .where(
+            time_record_workers.c.worker_id.in_(worker_ids),
+            TimeRecord.work_date == work_date,
+            or_(TimeRecord.end_time.is_(None), TimeRecord.end_time > start_time),
+        )
+        .order_by(TimeRecord.start_time, TimeRecord.id)
+    )
+    if end_time is not None:
+        stmt += lambda s: s.where(TimeRecord.start_time < end_time)
+    if exclude_record_id is not None:
+        stmt += lambda s: s.where(TimeRecord.id != exclude_record_id)
+    return [Booking(*row) for row in db.execute(stmt)]
+
+
+def check_overlaps(
+    db: Session,
+    worker_ids: Iterable[int],
+    work_date: date,
+    start_time: time,
+    end_time: Optional[time],
+    exclude_record_id: Optional[int] = None,
+):
+    """Raise OverlapError if any of the workers is booked in the interval."""
+    bookings = find_overlaps(db, worker_ids, work_date, start_time, end_time, exclude_record_id)
+    if bookings:
+        raise OverlapError(bookings, db)
+
+
+def bookings_by_day(
+    db: Session, worker_ids: Iterable[int], work_dates: Iterable[date]
+) -> Dict[Tuple[int, date], List[Booking]]:
+    """Existing bookings of the workers on the days, for checking a batch at once."""
+    worker_ids = list(set(worker_ids))
+    work_dates = list(set(work_dates))
+    if not worker_ids or not work_dates:
+        return {}
+    r = TimeRecord.__table__
+    links = time_record_workers
+    found: Dict[Tuple[int, date], List[Booking]] = {}
+    for worker_id, work_date, record_id, start_time, end_time in db.execute(
+        select(links.c.worker_id, r.c.work_date, r.c.id, r.c.start_time, r.c.end_time)
+        .select_from(links.join(r, r.c.id == links.c.time_record_id))
+        .where(links.c.worker_id.in_(worker_ids), r.c.work_date.in_(work_dates))
+    ):
+        found.setdefault((worker_id, work_date), []).append(Booking(worker_id, record_id, start_time, end_time))
+    return found
+
+
+def first_overlap(bookings: List[Booking], start_time: time, end_time: Optional[time]) -> Optional[Booking]:
+    """The first of `bookings` that overlaps the interval, if any."""
+    for booking in bookings:
+        if booking.start_time < _end(end_time) and start_time < _end(booking.end_time):
+            return booking
+    return None
+
+
+def _sweep(rows) -> List[OverlapPair]:
+    """Overlapping pairs from rows sorted by (worker, day, start)."""
+    pairs: List[OverlapPair] = []
+    group = None
+    active: List[Booking] = []
+    for worker_id, work_date, record_id, start_time, end_time in rows:
+        if (worker_id, work_date) != group:
+            group = (worker_id, work_date)
+            active = []
+        # Everything still active started earlier and hasn't ended yet
+        active = [b for b in active if _end(b.end_time) > start_time]
+        booking = Booking(worker_id, record_id, start_time, end_time)
+        for earlier in active:
+            pairs.append(OverlapPair(worker_id, work_date, earlier, booking))
+        active.append(booking)
+    return pairs
+
+
+def _select_bookings(records, links, start_date: date, end_date: date):
+    r = records.__table__
+    return (
+        select(links.c.worker_id, r.c.work_date, r.c.id, r.c.start_time, r.c.end_time)
+        .select_from(links.join(r, r.c.id == links.c.time_record_id))
+        .where(r.c.work_date >= start_date, r.c.work_date <= end_date)
+        .order_by(links.c.worker_id, r.c.work_date, r.c.start_time, r.c.id)
+    )
+
+
+def find_existing_overlaps(db: Session, start_date: date, end_date: date) -> List[OverlapPair]:
+    """Every pair of overlapping records sharing a worker in the range.
+
+    Ordered by worker, then day, then start time.
+    """
+    rows = list(db.execute(_select_bookings(TimeRecord, time_record_workers, start_date, end_date)))
+    if archive_reaches(db, start_date):
+        rows.extend(db.execute(_select_bookings(
+            ArchivedTimeRecord, time_record_workers_archive, start_date, end_date
+        )))
+        rows.sort(key=lambda row: (row[0], row[1], row[3], row[2]))
+    return _sweep(rows)
@@ -0,0 +1,213 @@
+"""The report engine: one pass over a column query plus the dimension cache.
+
+Reports only need a few columns of each record and the names of its
+property and workers. Records are read with their worker ids through one
+outer join, with no ORM objects, and names come from the in-memory
+dimension cache. `run_report` folds that single scan into the totals,
+the per-property and per-worker breakdowns and a page of rows, so the
+summary, preview, export and combined report endpoints are all views of
+one Report.
+"""
+import heapq
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedTimeRecord, time_record_workers_archive
+from app.models.time_record import TimeRecord, time_record_workers
+from app.services.archival import archive_reaches
+from app.services.dimensions import dimension_cache
+
+
+@dataclass
+class ReportRow:
+    id: int
+    work_date: date
+    property_id: int
+    property_name: str
+    cleanup_type: str
+    total_minutes: int
+    total_cost: Decimal
+    worker_ids: List[int] = field(default_factory=list)
+    worker_names: List[str] = field(default_factory=list)
+
+
+def _select_rows(records, links, start_date, end_date, property_id):
+    r = records.__table__
+    stmt = (
+        select(r.c.id, r.c.work_date, r.c.property_id, r.c.total_minutes, r.c.total_cost, links.c.worker_id)
+        .select_from(r.outerjoin(links, links.c.time_record_id == r.c.id))
+        .where(
+            r.c.work_date >= start_date,
+            r.c.work_date <= end_date,
+            r.c.total_minutes.isnot(None),
+        )
+        .order_by(r.c.work_date.desc(), r.c.id, links.c.worker_id)
+    )
+    if property_id:
+        stmt = stmt.where(r.c.property_id == property_id)
+    return stmt
+
+
+@dataclass
+class Breakdown:
+    """Totals of the records of one property or one worker."""
+    id: int
+    name: str
+    total_minutes: int = 0
+    total_cost: Decimal = Decimal("0")
+    records_count: int = 0
+
+
+@dataclass
+class Report:
+    """Everything a report screen shows, from one pass over the records.
+
+    `rows` holds only the requested page; the totals and breakdowns cover
+    every matching record.
+    """
+    total_minutes: int = 0
+    total_cost: Decimal = Decimal("0")
+    records_count: int = 0
+    properties: Dict[int, Breakdown] = field(default_factory=dict)
+    workers: Dict[int, Breakdown] = field(default_factory=dict)
+    rows: List[ReportRow] = field(default_factory=list)
+
+    @property
+    def total_hours(self) -> float:
+        return self.total_minutes / 60
+
+
+def _grouped(results) -> Iterator[tuple]:
+    """(record columns, worker ids) per record from the joined rows."""
+    current = None
+    worker_ids: List[int] = []
+    for record_id, work_date, prop_id, total_minutes, total_cost, worker_id in results:
+        if current is None or current[0] != record_id:
+            if current is not None:
+                yield current, worker_ids
+            current = (record_id, work_date, prop_id, total_minutes, total_cost)
+            worker_ids = []
+        if worker_id is not None:
+            worker_ids.append(worker_id)
+    if current is not None:
+        yield current, worker_ids
+
+
+def _newest_first(grouped: tuple) -> tuple:
+    """Sort key matching _select_rows: work date descending, then id."""
+    (record_id, work_date, *_), _ = grouped
+    return -work_date.toordinal(), record_id
+
+
+def run_report(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    property_id: Optional[int] = None,
+    cleanup_type: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Report:
+    """Totals, per-property and per-worker breakdowns and a page of rows.
+
+    Closed records in the range are read once, newest first; archived
+    seasons only when the range reaches them. ReportRows are built only
+    for records `offset` to `offset + limit` (all of them when limit is
+    None, none when it is 0). cleanup_type is "spring", "fall" or None.
+    """
+    sources = [(TimeRecord, time_record_workers)]
+    if archive_reaches(db, start_date):
+        sources.append((ArchivedTimeRecord, time_record_workers_archive))
+
+    properties = dimension_cache.properties(db)
+    workers = dimension_cache.workers(db)
+    if cleanup_type == "spring":
+        keep = {p.id for p in properties.values() if p.is_spring_cleanup}
+    elif cleanup_type == "fall":
+        keep = {p.id for p in properties.values() if p.is_fall_cleanup}
+    else:
+        keep = None
+
+    def property_info(prop_id: int):
+        # Ids the cache hasn't seen yet trigger a (rate-limited) reload
+        return properties.get(prop_id) or dimension_cache.get_property(db, prop_id)
+
+    def worker_info(worker_id: int):
+        worker = workers.get(worker_id)
+        if worker is None:
+            found = dimension_cache.get_workers(db, [worker_id])
+            worker = found[0] if found else None
+        return worker
+
+    # Imported history can put old dates in the live table too, so the
+    # sources are merged in the order each one is sorted by
+    records = heapq.merge(
+        *(
+            _grouped(db.execute(_select_rows(records, links, start_date, end_date, property_id)))
+            for records, links in sources
+        ),
+        key=_newest_first,
+    )
+
+    report = Report()
+    page_end = None if limit is None else offset + limit
+    for (record_id, work_date, prop_id, total_minutes, total_cost), worker_ids in records:
+        if keep is not None and prop_id not in keep:
+            continue
+        minutes = total_minutes or 0
+        cost = total_cost or Decimal("0")
+        report.total_minutes += minutes
+        report.total_cost += cost
+
+        by_property = report.properties.get(prop_id)
+        if by_property is None:
+            prop = property_info(prop_id)
+            by_property = report.properties[prop_id] = Breakdown(prop_id, prop.name if prop else "")
+        by_property.total_minutes += minutes
+        by_property.total_cost += cost
+        by_property.records_count += 1
+
+        names = []
+        for worker_id in worker_ids:
+            by_worker = report.workers.get(worker_id)
+            if by_worker is None:
+                worker = worker_info(worker_id)
+                by_worker = report.workers[worker_id] = Breakdown(worker_id, worker.name if worker else "")
+            # Each worker on the crew worked the record's hours; costs
+            # aren't split per worker
+            by_worker.total_minutes += minutes
+            by_worker.records_count += 1
+            names.append(by_worker.name)
+
+        position = report.records_count
+        report.records_count += 1
+        if position >= offset and (page_end is None or position < page_end):
+            prop = property_info(prop_id)
+            report.rows.append(ReportRow(
+                id=record_id,
+                work_date=work_date,
+                property_id=prop_id,
+                property_name=prop.name if prop else "",
+                cleanup_type=prop.cleanup_type if prop else "",
+                total_minutes=total_minutes,
+                total_cost=total_cost,
+                worker_ids=worker_ids,
+                worker_names=names,
+            ))
+    return report
+
+
+def load_report_rows(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    property_id: Optional[int] = None,
+    cleanup_type: Optional[str] = None,
+) -> List[ReportRow]:
+    """Closed records in the range, newest first, as ReportRows."""
+    return run_report(db, start_date, end_date, property_id, cleanup_type).rows
@@ -0,0 +1,273 @@
+"""Typeahead search over properties and workers, and full-text search
+over time-record notes.
+
+Each backend gets the index that suits it:
+
+- SQLite: an FTS5 table kept in sync with the source table by triggers.
+  Names use the trigram tokenizer, which matches any substring of 3+
+  characters. Notes use word tokens with Porter stemming, so "hauled"
+  finds "haul" and "hauling", ranked by bm25. Archived records have
+  their own notes index.
+- MySQL: a FULLTEXT index, with the ngram parser for names (plus a
+  B-tree index on name for prefixes) and the word parser for notes, on
+  both the live and the archive table.
+
+Name queries too short for the index fall back to a name prefix match,
+and databases without an index to a plain LIKE. Name results are ranked
+name prefix first, then word prefix, then any other substring, then
+address-only matches.
+"""
+import heapq
+import re
+from datetime import date
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, and_, case, column, func, literal, or_, select, table, text
+from sqlalchemy.dialects.mysql import match as mysql_match
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.models.archive import ArchivedTimeRecord
+from app.models.property import Property
+from app.models.time_record import TimeRecord
+from app.models.worker import Worker
+from app.services.archival import archive_reaches, latest_archived_date
+
+# Searchable columns per model; the first one is the display name
+SEARCH_FIELDS = {
+    Property: ("name", "address"),
+    Worker: ("name",),
+}
+
+# Full-text columns of time records, indexed by words rather than trigrams
+NOTES_FIELDS = ("notes",)
+# Tables whose notes are searched; archived records keep their own index
+NOTES_MODELS = (TimeRecord, ArchivedTimeRecord)
+
+SQLITE_MIN_QUERY_LENGTH = 3  # trigram tokenizer
+MYSQL_MIN_QUERY_LENGTH = 2  # default ngram_token_size
+
+# (database url, table) -> "fts5" | "fulltext" | "like"
+_backends: Dict[Tuple[str, str], str] = {}
+
+
+def _fts_table(model) -> str:
+    return f"{model.__tablename__}_fts"
+
+
+def _fulltext_index(model) -> str:
+    return f"ft_{model.__tablename__}_search"
+
+
+def _install_sqlite_fts(conn: Connection, model, fields, tokenize: str):
+    table = model.__tablename__
+    fts = _fts_table(model)
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+    ).first()
+    if exists:
+        return
+
+    cols = ", ".join(fields)
+    new_values = ", ".join(f"new.{f}" for f in fields)
+    old_values = ", ".join(f"old.{f}" for f in fields)
+    conn.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='{tokenize}')"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); END"
+    )
+    conn.exec_driver_sql(
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_values}); END"
+    )
+    # Index the rows that existed before the table
+    conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _install_mysql_fulltext(conn: Connection, model, fields, parser: Optional[str]):
+    table = model.__tablename__
+    index = _fulltext_index(model)
+    exists = conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+        ),
+        {"table": table, "index": index},
+    ).first()
+    if exists:
+        return
+    with_parser = f" WITH PARSER {parser}" if parser else ""
+    conn.exec_driver_sql(f"CREATE FULLTEXT INDEX {index} ON {table} ({', '.join(fields)}){with_parser}")
+
+
+def install_search_indexes(bind: Engine):
+    """Create the search indexes that are missing. Safe to run repeatedly."""
+    with bind.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            for model, fields in SEARCH_FIELDS.items():
+                _install_sqlite_fts(conn, model, fields, "trigram")
+            for model in NOTES_MODELS:
+                _install_sqlite_fts(conn, model, NOTES_FIELDS, "porter unicode61")
+        elif conn.dialect.name == "mysql":
+            for model, fields in SEARCH_FIELDS.items():
+                _install_mysql_fulltext(conn, model, fields, "ngram")
+            for model in NOTES_MODELS:
+                _install_mysql_fulltext(conn, model, NOTES_FIELDS, None)
+    _backends.clear()
+
+
+def _backend(db: Session, model) -> str:
+    """Which index the database has for the model, checked once per process."""
+    bind = db.get_bind()
+    key = (str(bind.url), model.__tablename__)
+    if key not in _backends:
+        found, backend = None, "like"
+        if bind.dialect.name == "sqlite":
+            found = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": _fts_table(model)},
+            ).first()
+            backend = "fts5"
+        elif bind.dialect.name == "mysql":
+            found = db.execute(
+                text(
+                    "SELECT 1 FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index"
+                ),
+                {"table": model.__tablename__, "index": _fulltext_index(model)},
+            ).first()
+            backend = "fulltext"
+        _backends[key] = backend if found else "like"
+    return _backends[key]
+
+
+def _match_clause(db: Session, model, q: str):
+    fields = SEARCH_FIELDS[model]
+    backend = _backend(db, model)
+
+    if backend == "fts5" and len(q) >= SQLITE_MIN_QUERY_LENGTH:
+        fts = _fts_table(model)
+        ids = text(f"SELECT rowid FROM {fts} WHERE {fts} MATCH :match").bindparams(
+            match='"' + q.replace('"', '""') + '"'
+        ).columns(column("rowid", Integer))
+        return model.id.in_(ids)
+
+    if backend == "fulltext" and len(q) >= MYSQL_MIN_QUERY_LENGTH:
+        # A quoted phrase of ngrams matches the query as a substring
+        return text(f"MATCH({', '.join(fields)}) AGAINST (:match IN BOOLEAN MODE)").bindparams(
+            match='"' + q.replace('"', " ") + '"'
+        )
+
+    if len(q) >= SQLITE_MIN_QUERY_LENGTH:
+        return or_(*(getattr(model, f).contains(q, autoescape=True) for f in fields))
+    return model.name.startswith(q, autoescape=True)
+
+
+def search(db: Session, model, q: str, limit: int = 10, include_inactive: bool = False) -> List:
+    """Best `limit` matches for `q` among rows of `model`."""
+    q = q.strip()
+    if not q:
+        return []
+
+    rank = case(
+        (model.name.startswith(q, autoescape=True), 0),
+        (model.name.contains(" " + q, autoescape=True), 1),
+        (model.name.contains(q, autoescape=True), 2),
+        else_=3,
+    )
+    query = db.query(model).filter(_match_clause(db, model, q))
+    if not include_inactive:
+        query = query.filter(model.is_active == True)
+    return query.order_by(rank, func.length(model.name), model.name).limit(limit).all()
+
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+
+
+def _select_notes(db: Session, model, words: List[str], filters: list):
+    """Count and ranked statements for rows of `model` whose notes match.
+
+    Ranked rows are (id, work_date, score), best first: lowest score, then
+    newest, then highest id.
+    """
+    backend = _backend(db, model)
+    if backend == "fts5":
+        fts = _fts_table(model)
+        index = table(fts, column("rowid", Integer))
+        terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+        source = model.__table__.join(index, index.c.rowid == model.id)
+        filters = filters + [text(f"{fts} MATCH :match").bindparams(match=" ".join(terms))]
+        # bm25 is lower for better matches
+        score = func.bm25(column(fts))
+    elif backend == "fulltext":
+        source = model.__table__
+        relevance = mysql_match(model.notes, against=" ".join(f"+{w}" for w in words) + "*").in_boolean_mode()
+        filters = filters + [relevance]
+        score = -relevance
+    else:
+        source = model.__table__
+        filters = filters + [and_(*(model.notes.contains(w, autoescape=True) for w in words))]
+        score = literal(0)
+
+    count = select(func.count()).select_from(source).where(*filters)
+    ranked = (
+        select(model.id, model.work_date, score.label("score"))
+        .select_from(source)
+        .where(*filters)
+        .order_by(score, model.work_date.desc(), model.id.desc())
+    )
+    return count, ranked
+
+
+def search_notes(
+    db: Session,
+    q: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    property_id: Optional[int] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> Tuple[int, List[int]]:
+    """Ids of records whose notes match every word of `q`, best first.
+
+    The last word also matches as a prefix. Archived records are searched
+    too when the date range reaches the archive. Returns the total number
+    of matches and the ids of the requested page.
+    """
+    words = _WORDS.findall(q.lower())
+    if not words:
+        return 0, []
+
+    models = [TimeRecord]
+    if start_date is None:
+        if latest_archived_date(db) is not None:
+            models.append(ArchivedTimeRecord)
+    elif archive_reaches(db, start_date):
+        models.append(ArchivedTimeRecord)
+
+    total, pages = 0, []
+    for model in models:
+        filters = []
+        if start_date:
+            filters.append(model.work_date >= start_date)
+        if end_date:
+            filters.append(model.work_date <= end_date)
+        if property_id:
+            filters.append(model.property_id == property_id)
+        count, ranked = _select_notes(db, model, words, filters)
+        total += db.execute(count).scalar()
+        if len(models) == 1:
+            return total, db.execute(ranked.limit(limit).offset(offset)).scalars().all()
+        # Each table's best offset + limit, merged in the same order
+        pages.append(db.execute(ranked.limit(offset + limit)).all())
+
+    merged = heapq.merge(*pages, key=lambda row: (row.score, -row.work_date.toordinal(), -row.id))
+    return total, [row.id for row in islice(merged, offset, offset + limit)]
@@ -0,0 +1,119 @@
+"""Direct ORM-to-JSON serialization for large list responses.
+
+These build plain dicts straight from loaded rows with the same keys and
+order as the pydantic response schemas, skipping per-object model
+validation. Rows coming from our own database are already valid.
+
+The normalized shape (`?shape=normalized` on the list endpoints) sends
+each worker and property once, keyed by id, and records refer to them by
+worker_ids and property_id instead of embedding them.
+"""
+from typing import Iterable, List
+
+from pydantic import TypeAdapter
+
+from app.models.property import Property
+from app.models.time_record import TimeRecord
+from app.models.worker import Worker
+from app.schemas.time_record import TimeRecordResponse
+
+# Validating serializer for list responses, built once at import
+time_record_list_adapter = TypeAdapter(List[TimeRecordResponse])
+
+
+def serialize_worker(worker: Worker) -> dict:
+    """Same shape as WorkerResponse."""
+    return {
+        "name": worker.name,
+        "phone": worker.phone,
+        "id": worker.id,
+        "hourly_rate": worker.hourly_rate,
+        "is_active": worker.is_active,
+    }
+
+
+def serialize_property(property: Property) -> dict:
+    """Same shape as PropertyResponse."""
+    return {
+        "name": property.name,
+        "address": property.address,
+        "is_spring_cleanup": property.is_spring_cleanup,
+        "is_fall_cleanup": property.is_fall_cleanup,
+        "id": property.id,
+        "is_active": property.is_active,
+    }
+
+
+def serialize_time_records(records: Iterable[TimeRecord]) -> List[dict]:
+    """Same shape as List[TimeRecordResponse].
+
+    Workers and properties repeat across a list, so each one is converted
+    once and the dict is shared between records.
+    """
+    workers = {}
+    properties = {}
+    result = []
+    for r in records:
+        record_workers = []
+        for w in r.workers:
+            data = workers.get(w.id)
+            if data is None:
+                data = workers[w.id] = serialize_worker(w)
+            record_workers.append(data)
+
+        property_data = None
+        if r.property is not None:
+            property_data = properties.get(r.property.id)
+            if property_data is None:
+                property_data = properties[r.property.id] = serialize_property(r.property)
+
+        data = _record_fields(r)
+        data["workers"] = record_workers
+        data["property"] = property_data
+        result.append(data)
+    return result
+
+
+def _record_fields(r: TimeRecord) -> dict:
+    return {
+        "property_id": r.property_id,
+        "work_date": r.work_date,
+        "start_time": r.start_time,
+        "end_time": r.end_time,
+        "break_minutes": r.break_minutes,
+        "is_manual_entry": r.is_manual_entry,
+        "notes": r.notes,
+        "id": r.id,
+        "version": r.version,
+        "total_minutes": r.total_minutes,
+        "total_cost": r.total_cost,
+    }
+
+
+def serialize_time_records_normalized(records: Iterable[TimeRecord]) -> dict:
+    """{"records", "workers", "properties"} with each worker and property once.
+
+    Records carry worker_ids instead of workers and no property object;
+    workers and properties are keyed by id (as strings, like any JSON
+    object key).
+    """
+    workers = {}
+    properties = {}
+    result = []
+    for r in records:
+        worker_ids = []
+        for w in r.workers:
+            if w.id not in workers:
+                workers[w.id] = serialize_worker(w)
+            worker_ids.append(w.id)
+        if r.property is not None and r.property.id not in properties:
+            properties[r.property.id] = serialize_property(r.property)
+
+        data = _record_fields(r)
+        data["worker_ids"] = worker_ids
+        result.append(data)
+    return {
+        "records": result,
+        "workers": {str(k): v for k, v in workers.items()},
+        "properties": {str(k): v for k, v in properties.items()},
+    }
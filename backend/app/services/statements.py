@@ -0,0 +1,89 @@
+"""Statements of the hot request paths, built once per process.
+
+Every timer, list and auth request used to assemble its query from
+scratch: select, filters, joinedload options, order_by. SQLAlchemy caches
+the compiled SQL, but it finds the cache entry by a key computed from the
+statement's structure, so each request still paid for building that
+structure and walking it to compute the key.
+
+The statements here are lambda_stmt()s. The lambda runs once; after that
+SQLAlchemy identifies the statement by the lambda's code and only pulls
+the current values of its closure variables (username, record_id, ...)
+out as bound parameters. Lists used with IN are expanding parameters, so
+one cache entry serves any number of ids.
+
+Conditional parts are added with `stmt += lambda s: ...`; each combination
+gets its own cache entry.
+"""
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import lambda_stmt, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.archive import ArchivedTimeRecord
+from app.models.property import Property
+from app.models.time_record import TimeRecord
+from app.models.user import User
+from app.models.worker import Worker
+
+
+def user_by_username(db: Session, username: str) -> Optional[User]:
+    stmt = lambda_stmt(lambda: select(User).where(User.username == username))
+    return db.execute(stmt).scalars().first()
+
+
+def record_by_id(db: Session, record_id: int) -> Optional[TimeRecord]:
+    """The record with its workers and property."""
+    stmt = lambda_stmt(
+        lambda: select(TimeRecord)
+        .options(joinedload(TimeRecord.workers), joinedload(TimeRecord.property))
+        .where(TimeRecord.id == record_id)
+    )
+    return db.execute(stmt).unique().scalar_one_or_none()
+
+
+def records_on(db: Session, work_date: date) -> List[TimeRecord]:
+    """Records of the day with their workers and property, latest start first."""
+    stmt = lambda_stmt(
+        lambda: select(TimeRecord)
+        .options(joinedload(TimeRecord.workers), joinedload(TimeRecord.property))
+        .where(TimeRecord.work_date == work_date)
+        .order_by(TimeRecord.start_time.desc())
+    )
+    return db.execute(stmt).unique().scalars().all()
+
+
+def records_by_ids(db: Session, record_ids: List[int]) -> List[TimeRecord]:
+    """Records with their workers and property, in no particular order."""
+    stmt = lambda_stmt(
+        lambda: select(TimeRecord)
+        .options(joinedload(TimeRecord.workers), joinedload(TimeRecord.property))
+        .where(TimeRecord.id.in_(record_ids))
+    )
+    return db.execute(stmt).unique().scalars().all()
+
+
+def archived_records_by_ids(db: Session, record_ids: List[int]) -> List[ArchivedTimeRecord]:
+    """Archived records with their workers and property, in no particular order."""
+    stmt = lambda_stmt(
+        lambda: select(ArchivedTimeRecord)
+        .options(joinedload(ArchivedTimeRecord.workers), joinedload(ArchivedTimeRecord.property))
+        .where(ArchivedTimeRecord.id.in_(record_ids))
+    )
+    return db.execute(stmt).unique().scalars().all()
+
+
+def worker_by_id(db: Session, worker_id: int) -> Optional[Worker]:
+    stmt = lambda_stmt(lambda: select(Worker).where(Worker.id == worker_id))
+    return db.execute(stmt).scalar_one_or_none()
+
+
+def workers_by_ids(db: Session, worker_ids: List[int]) -> List[Worker]:
+    stmt = lambda_stmt(lambda: select(Worker).where(Worker.id.in_(worker_ids)))
+    return db.execute(stmt).scalars().all()
+
+
+def property_by_id(db: Session, property_id: int) -> Optional[Property]:
+    stmt = lambda_stmt(lambda: select(Property).where(Property.id == property_id))
+    return db.execute(stmt).scalar_one_or_none()
@@ -0,0 +1,227 @@
+"""Replay of timer events queued on a device while it was offline.
+
+Events are applied in the order given, each with its own timestamp, in
+one transaction. Each event runs in a savepoint, so one that fails leaves
+the others in place. Every outcome is stored in timer_events under the
+client's event id. Uploading the same event again returns "duplicate"
+with the first outcome's record instead of applying it twice.
+
+Outcomes:
+- applied: the event changed the record.
+- duplicate: the event id was seen before; nothing changed.
+- conflict: the event no longer fits the server state (the timer was
+  already stopped, the record was deleted, or a worker is already on an
+  overlapping record).
+- rejected: the event is invalid (unknown property or workers, stop
+  before start, editing another day's record without admin rights, or a
+  timestamp outside the replay window).
+
+Timestamps come from the device, so they are only trusted within a window
+measured on the server clock: up to TIMER_EVENT_MAX_AGE_HOURS old and
+TIMER_EVENT_MAX_CLOCK_SKEW_SECONDS ahead. Permission checks use the
+server's date, never the event's.
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.config import settings
+from app.database import begin_write_transaction
+from app.models.time_record import TimeRecord
+from app.models.timer_event import TimerEvent
+from app.models.user import User, UserRole
+from app.schemas.time_record import TimerEventIn
+from app.services.dimensions import attach_workers, dimension_cache
+from app.services.overlaps import OverlapError, check_overlaps
+
+
+class EventError(Exception):
+    def __init__(self, status: str, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def _local(moment: datetime) -> datetime:
+    """Client timestamps as naive server-local time, like datetime.now()."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+class _Replay:
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+        # start event id -> record id, for this batch and earlier ones
+        self.started: Dict[str, Optional[int]] = {}
+
+    def check_time(self, at: datetime):
+        now = datetime.now()
+        if at < now - timedelta(hours=settings.TIMER_EVENT_MAX_AGE_HOURS):
+            raise EventError(
+                "rejected", f"Events older than {settings.TIMER_EVENT_MAX_AGE_HOURS} hours can't be replayed"
+            )
+        if at > now + timedelta(seconds=settings.TIMER_EVENT_MAX_CLOCK_SKEW_SECONDS):
+            raise EventError("rejected", "Event time is in the future")
+
+    def _workers(self, worker_ids: List[int]):
+        infos = dimension_cache.get_workers(self.db, worker_ids)
+        workers = attach_workers(self.db, infos) if infos is not None else None
+        if workers is None:
+            raise EventError("rejected", "One or more workers not found")
+        return workers
+
+    def _check_property(self, property_id: int):
+        if dimension_cache.get_property(self.db, property_id) is None:
+            raise EventError("rejected", "Property not found")
+
+    def _check_overlaps(self, record: TimeRecord, worker_ids):
+        try:
+            check_overlaps(self.db, worker_ids, record.work_date, record.start_time, record.end_time, record.id)
+        except OverlapError as exc:
+            raise EventError("conflict", str(exc))
+
+    def _target(self, event: TimerEventIn) -> TimeRecord:
+        record_id = event.time_record_id
+        if record_id is None and event.start_event_id:
+            if event.start_event_id not in self.started:
+                self.started[event.start_event_id] = self.db.execute(
+                    select(TimerEvent.time_record_id).where(
+                        TimerEvent.user_id == self.user.id,
+                        TimerEvent.event_id == event.start_event_id,
+                        TimerEvent.status == "applied",
+                    )
+                ).scalar()
+            record_id = self.started[event.start_event_id]
+            if record_id is None:
+                raise EventError("conflict", "The timer's start event was not applied")
+        if record_id is None:
+            raise EventError("rejected", "Event needs time_record_id or start_event_id")
+        record = self.db.get(TimeRecord, record_id)
+        if record is None:
+            raise EventError("conflict", "Time record not found")
+        return record
+
+    def start(self, event: TimerEventIn, at: datetime) -> TimeRecord:
+        if event.property_id is None or not event.worker_ids:
+            raise EventError("rejected", "Start needs property_id and worker_ids")
+        self._check_property(event.property_id)
+        record = TimeRecord(
+            property_id=event.property_id,
+            work_date=at.date(),
+            start_time=at.time(),
+            is_manual_entry=False,
+            notes=event.notes,
+        )
+        record.workers = self._workers(event.worker_ids)
+        self._check_overlaps(record, event.worker_ids)
+        self.db.add(record)
+        return record
+
+    def stop(self, event: TimerEventIn, at: datetime) -> TimeRecord:
+        record = self._target(event)
+        if record.end_time:
+            raise EventError("conflict", "Timer already stopped")
+        if at.date() != record.work_date or at.time() <= record.start_time:
+            raise EventError("rejected", "Stop time must be after the start on the same day")
+        record.end_time = at.time()
+        if event.break_minutes is not None:
+            record.break_minutes = event.break_minutes
+        if event.worker_ids:
+            # Stopping only shortens the record; new workers may still overlap
+            joining = set(event.worker_ids) - {w.id for w in record.workers}
+            record.replace_workers(self._workers(event.worker_ids))
+            self._check_overlaps(record, joining)
+        record.calculate_totals(record.workers)
+        return record
+
+    def edit(self, event: TimerEventIn, at: datetime) -> TimeRecord:
+        record = self._target(event)
+        # Same rule as PUT /time-records: workers only edit today's records
+        if self.user.role != UserRole.ADMIN and record.work_date != date.today():
+            raise EventError("rejected", "You can only edit today's records")
+        if event.property_id is not None:
+            self._check_property(event.property_id)
+            record.property_id = event.property_id
+        if event.worker_ids is not None:
+            record.replace_workers(self._workers(event.worker_ids))
+            self._check_overlaps(record, event.worker_ids)
+        if event.break_minutes is not None:
+            record.break_minutes = event.break_minutes
+        if event.notes is not None:
+            record.notes = event.notes
+        if record.end_time:
+            record.calculate_totals(record.workers)
+        return record
+
+
+def apply_timer_events(db: Session, user: User, events: List[TimerEventIn]) -> List[dict]:
+    """Apply the events in order and return one outcome per event.
+
+    Nothing is committed until every event has been handled: an
+    unexpected error leaves the whole batch to be retried.
+    """
+    replay = _Replay(db, user)
+    # The savepoints below must sit inside one transaction, or releasing
+    # one would commit that event on its own
+    begin_write_transaction(db)
+    seen = {
+        row.event_id: row
+        for row in db.execute(
+            select(TimerEvent).where(
+                TimerEvent.user_id == user.id,
+                TimerEvent.event_id.in_({e.event_id for e in events}),
+            )
+        ).scalars()
+    }
+
+    outcomes = []
+    for event in events:
+        previous = seen.get(event.event_id)
+        if previous is not None:
+            outcomes.append({
+                "event_id": event.event_id,
+                "status": "duplicate",
+                "time_record_id": previous.time_record_id,
+                "detail": f"Already received ({previous.status})",
+            })
+            continue
+
+        at = _local(event.occurred_at)
+        record_id, status, detail = None, "applied", None
+        try:
+            with db.begin_nested():
+                replay.check_time(at)
+                record = getattr(replay, event.type)(event, at)
+                db.flush()
+                record_id = record.id
+        except EventError as exc:
+            status, detail = exc.status, exc.detail
+            if exc.status == "conflict":
+                record_id = event.time_record_id or replay.started.get(event.start_event_id)
+        except StaleDataError:
+            # Another request changed the record since it was read here
+            db.expire_all()
+            status, detail = "conflict", "The record was changed by someone else at the same time"
+            record_id = event.time_record_id or replay.started.get(event.start_event_id)
+
+        if event.type == "start":
+            replay.started[event.event_id] = record_id if status == "applied" else None
+        seen[event.event_id] = stored = TimerEvent(
+            user_id=user.id,
+            event_id=event.event_id,
+            event_type=event.type,
+            occurred_at=at,
+            time_record_id=record_id,
+            status=status,
+            detail=detail,
+        )
+        db.add(stored)
+        outcomes.append({"event_id": event.event_id, "status": status, "time_record_id": record_id, "detail": detail})
+
+    db.commit()
+    return outcomes
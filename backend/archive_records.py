@@ -0,0 +1,41 @@
+"""
+Move closed seasons into the archive tables.
+Run: python archive_records.py [--keep-seasons 2] [--batch-size 5000] [--dry-run]
+
+Safe to interrupt and re-run; each batch is its own transaction.
+"""
+import argparse
+import sys
+sys.path.insert(0, '.')
+
+from app.config import settings
+from app.database import SessionLocal, init_db
+from app.services.archival import archive_cutoff, archive_records, count_archivable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old time records.")
+    parser.add_argument("--keep-seasons", type=int, default=settings.ARCHIVE_KEEP_SEASONS)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    init_db()
+    cutoff = archive_cutoff(args.keep_seasons)
+    db = SessionLocal()
+    try:
+        pending = count_archivable(db, cutoff)
+        print(f"{pending:,} closed records dated before {cutoff} to archive")
+        if args.dry_run or not pending:
+            return
+        moved = archive_records(
+            db, cutoff, args.batch_size,
+            progress=lambda n: print(f"  {n:,} / {pending:,}", end="\r", flush=True),
+        )
+        print(f"\n✅ Archived {moved:,} records")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Query latency of the columnar analytics snapshot.
+
+Writes a synthetic snapshot (no database needed) and times the questions
+the fixed reports can't answer: hours by weekday per property, average
+duration by crew size, hours per worker, and a one-worker filter.
+
+Run: python benchmarks/analytics.py [--records 1000000] [--properties 2000] [--workers 300]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, time as clock, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.analytics import SnapshotWriter, write_pointer, load_snapshot
+
+
+def build(directory: str, records: int, properties: int, workers: int, seed: int = 1):
+    rng = random.Random(seed)
+    writer = SnapshotWriter(os.path.join(directory, "gen-bench"))
+    start = date(2019, 4, 1)
+    for record_id in range(1, records + 1):
+        minutes = rng.randint(30, 480)
+        crew = rng.sample(range(1, workers + 1), rng.randint(1, 4))
+        writer.add(
+            record_id,
+            start + timedelta(days=rng.randint(0, 5 * 365)),
+            rng.randint(1, properties),
+            minutes,
+            minutes * 0.37 * len(crew),
+            clock(rng.randint(6, 15), rng.choice((0, 15, 30, 45))),
+            crew,
+        )
+    writer.flush()
+    write_pointer(directory, {
+        "generation": "gen-bench", "count": writer.count, "links": writer.links,
+        "max_id": records, "open_ids": [], "built_at": "", "refreshed_at": "",
+    })
+
+
+def timed(label: str, fn, repeat: int = 5):
+    fn()
+    began = time.perf_counter()
+    for _ in range(repeat):
+        rows = fn()
+    elapsed = (time.perf_counter() - began) / repeat
+    print(f"{label:>40}: {elapsed * 1000:7.1f} ms  ({len(rows)} groups)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--properties", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        began = time.perf_counter()
+        build(directory, args.records, args.properties, args.workers)
+        print(f"{args.records:,} records written in {time.perf_counter() - began:.1f}s")
+
+        snapshot = load_snapshot(directory)
+        season = snapshot.mask(date(2023, 1, 1), date(2023, 12, 31))
+        everything = snapshot.mask()
+        timed("hours by property x weekday (2023)", lambda: snapshot.aggregate(["property", "weekday"], "hours", season))
+        timed("avg hours by crew size", lambda: snapshot.aggregate(["crew_size"], "avg_hours", everything))
+        timed("hours by worker", lambda: snapshot.aggregate(["worker"], "hours", everything))
+        timed("one worker by month", lambda: snapshot.aggregate(["month"], "hours", snapshot.mask(worker_id=7)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Helpers shared by the benchmark scripts."""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_health(port: int, timeout: float = 30.0) -> float:
+    """Block until /api/health answers and return the elapsed seconds."""
+    started = time.perf_counter()
+    url = f"http://127.0.0.1:{port}/api/health"
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.01)
+    raise RuntimeError(f"Server on port {port} did not respond within {timeout}s")
+
+
+def start_server(port: int, env: dict, workers: int = 1) -> subprocess.Popen:
+    """Start the API under gunicorn.conf.py with the given worker count."""
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers), ACCESS_LOG="")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        wait_for_health(port)
+    except Exception:
+        stop_server(proc)
+        raise
+    return proc
+
+
+def stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+class Client:
+    """Minimal keep-alive JSON client, one per load-generating thread."""
+
+    def __init__(self, port: int, token: str = None):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+
+    def request(self, method: str, path: str, body=None):
+        """Send a request and return (status, parsed body or raw bytes)."""
+        payload = json.dumps(body) if body is not None else None
+        self.conn.request(method, path, body=payload, headers=self.headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        if response.getheader("Content-Type", "").startswith("application/json") and data:
+            return response.status, json.loads(data)
+        return response.status, data
+
+    def close(self):
+        self.conn.close()
+
+
+def login(port: int, username: str = "admin", password: str = "admin123") -> str:
+    client = Client(port)
+    try:
+        status, body = client.request("POST", "/api/auth/login", {"username": username, "password": password})
+        if status != 200:
+            raise RuntimeError(f"Login failed with status {status}: {body}")
+        return body["access_token"]
+    finally:
+        client.close()
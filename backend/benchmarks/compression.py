@@ -0,0 +1,75 @@
+"""
+CPU vs bytes benchmark for response compression.
+
+Compresses a time-record list and a report preview payload with every
+available encoding over a range of levels, and prints the compressed size,
+ratio and compression time so levels can be chosen per route.
+
+Run: python benchmarks/compression.py [--records 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.middleware.compression import SUPPORTED_ENCODINGS, compress
+from app.responses import ORJSONResponse
+from app.services.serialization import serialize_time_records
+from serialization import build_records
+
+LEVELS = {
+    "gzip": [1, 3, 6, 9],
+    "br": [1, 4, 6, 9, 11],
+    "zstd": [1, 3, 6, 12, 19],
+}
+
+
+def preview_payload(records) -> bytes:
+    rows = [
+        {
+            "id": r.id,
+            "date": r.work_date.isoformat(),
+            "property": r.property.name,
+            "type": "Spring" if r.property.is_spring_cleanup else "",
+            "workers": [w.name for w in r.workers],
+            "hours": round(r.total_minutes / 60, 2),
+            "cost": float(r.total_cost),
+        }
+        for r in records
+    ]
+    return ORJSONResponse({"records": rows, "total_hours": 0, "total_cost": 0}).body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = build_records(args.records)
+    payloads = {
+        "time-records": ORJSONResponse(serialize_time_records(records)).body,
+        "preview": preview_payload(records),
+    }
+
+    for name, data in payloads.items():
+        print(f"\n{name}: {len(data):,} bytes uncompressed")
+        print(f"{'encoding':<10}{'level':>6}{'bytes':>12}{'ratio':>8}{'ms':>9}{'MB/s':>9}")
+        for encoding in SUPPORTED_ENCODINGS:
+            for level in LEVELS[encoding]:
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    out = compress(data, encoding, level)
+                    timings.append(time.perf_counter() - started)
+                best = min(timings)
+                print(
+                    f"{encoding:<10}{level:>6}{len(out):>12,}{len(data) / len(out):>8.1f}"
+                    f"{best * 1000:>9.2f}{len(data) / best / 1e6:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Throughput of the per-property export bundle by process count.
+
+Builds synthetic report rows for a season, then times building the ZIP
+in-process (one workbook after another) and through stream_bundle with
+each process count. Also checks that every bundle holds one readable
+workbook per property.
+
+Run: python benchmarks/export_bundle.py [--properties 200] [--rows 40] [--processes 1,2,4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.export_bundle import build_workbook, export_pool, group_by_property, shutdown_pool, stream_bundle
+from app.services.reporting import ReportRow
+
+
+def build_rows(properties: int, rows_per_property: int, seed: int = 1):
+    rng = random.Random(seed)
+    start = date(2024, 4, 1)
+    rows = []
+    record_id = 0
+    for property_id in range(1, properties + 1):
+        for _ in range(rows_per_property):
+            record_id += 1
+            minutes = rng.randint(60, 480)
+            crew = rng.sample(["Alex", "Mike", "John", "Sam", "Lee", "Kim"], rng.randint(1, 3))
+            rows.append(ReportRow(
+                id=record_id,
+                work_date=start + timedelta(days=rng.randint(0, 180)),
+                property_id=property_id,
+                property_name=f"Property {property_id}",
+                cleanup_type=rng.choice(["", "Spring", "Fall"]),
+                total_minutes=minutes,
+                total_cost=Decimal(minutes * 22 * len(crew)) / 60,
+                worker_names=crew,
+            ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--properties", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=40, help="records per property")
+    parser.add_argument("--processes", default="1,2,4")
+    args = parser.parse_args()
+
+    groups = group_by_property(build_rows(args.properties, args.rows))
+    start, end = date(2024, 1, 1), date(2024, 12, 31)
+    print(f"{args.properties} properties x {args.rows} records, {os.cpu_count()} CPUs")
+
+    began = time.perf_counter()
+    for rows in groups.values():
+        build_workbook(rows, start, end, rows[0].property_name)
+    serial = time.perf_counter() - began
+    print(f"{'in-process':>12}: {serial:6.2f}s  {args.properties / serial:7.1f} workbooks/s")
+
+    for processes in [int(p) for p in args.processes.split(",")]:
+        settings.EXPORT_PROCESSES = processes
+        shutdown_pool()
+        # Start the workers outside the timing
+        export_pool().submit(int).result()
+
+        began = time.perf_counter()
+        data = b"".join(stream_bundle(groups, start, end))
+        elapsed = time.perf_counter() - began
+
+        names = zipfile.ZipFile(io.BytesIO(data)).namelist()
+        assert len(names) == len(groups), (len(names), len(groups))
+        print(
+            f"{processes:>3} process{'es' if processes > 1 else '  '}: {elapsed:6.2f}s  "
+            f"{args.properties / elapsed:7.1f} workbooks/s  {serial / elapsed:4.2f}x  {len(data) / 1e6:.1f} MB"
+        )
+    shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Throughput scaling benchmark for the multi-process server.
+
+Starts gunicorn.conf.py with 1, 2, ... N workers against a seeded
+database and measures requests per second on the list and timer endpoints.
+
+Run: python benchmarks/scaling.py [--workers 1,2,4] [--duration 10] [--concurrency 16]
+
+Set DATABASE_URL to benchmark MySQL; SQLite serializes writes across
+processes, so the timer numbers only scale on a server database.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import BACKEND_DIR, Client, free_port, login, start_server, stop_server
+
+
+def seed(env: dict):
+    """Seed the benchmark database in a child process so env is honoured."""
+    import subprocess
+
+    subprocess.check_call([sys.executable, "seed.py"], cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+
+
+def list_records(client: Client, ids: dict):
+    status, _ = client.request("GET", "/api/time-records/today")
+    return status == 200
+
+
+def start_stop_timer(client: Client, ids: dict):
+    status, record = client.request(
+        "POST", "/api/time-records/start", {"property_id": ids["property_id"], "worker_ids": ids["worker_ids"]}
+    )
+    if status != 201:
+        return False
+    status, _ = client.request("POST", "/api/time-records/stop", {"time_record_id": record["id"]})
+    if status != 200:
+        return False
+    # Keep the dataset constant so later runs list the same rows
+    status, _ = client.request("DELETE", f"/api/time-records/{record['id']}")
+    return status == 204
+
+
+SCENARIOS = {
+    "list": list_records,
+    "timer": start_stop_timer,
+}
+
+
+def run_load(port: int, token: str, ids: dict, scenario, duration: float, concurrency: int) -> dict:
+    """Hammer the server from `concurrency` threads for `duration` seconds."""
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        client = Client(port, token)
+        ok = failed = 0
+        while time.perf_counter() < deadline:
+            try:
+                if scenario(client, ids):
+                    ok += 1
+                else:
+                    failed += 1
+            except Exception:
+                failed += 1
+                client.close()
+                client = Client(port, token)
+        client.close()
+        with lock:
+            counts["ok"] += ok
+            counts["failed"] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"rps": round(counts["ok"] / elapsed, 1), **counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=",".join(str(n) for n in (1, 2, 4)))
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default="list,timer")
+    args = parser.parse_args()
+
+    env = dict(os.environ, CREATE_TABLES_ON_STARTUP="false", MAX_REQUESTS="0")
+    if "DATABASE_URL" not in env:
+        db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    seed(env)
+
+    results = []
+    for workers in [int(n) for n in args.workers.split(",")]:
+        port = free_port()
+        proc = start_server(port, env, workers)
+        try:
+            token = login(port)
+            client = Client(port, token)
+            _, workers_list = client.request("GET", "/api/workers")
+            _, properties = client.request("GET", "/api/properties")
+            client.close()
+            ids = {"property_id": properties[0]["id"], "worker_ids": [w["id"] for w in workers_list[:2]]}
+            for name in args.scenarios.split(","):
+                result = run_load(port, token, ids, SCENARIOS[name], args.duration, args.concurrency)
+                results.append({"workers": workers, "scenario": name, **result})
+                print(json.dumps(results[-1]))
+        finally:
+            stop_server(proc)
+
+    print(f"\nCPU cores: {os.cpu_count()}")
+    print(f"{'scenario':<10}{'workers':>8}{'req/s':>10}{'speedup':>10}")
+    for name in args.scenarios.split(","):
+        rows = [r for r in results if r["scenario"] == name]
+        base = rows[0]["rps"] or 1
+        for r in rows:
+            print(f"{name:<10}{r['workers']:>8}{r['rps']:>10}{r['rps'] / base:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
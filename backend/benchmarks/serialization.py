@@ -0,0 +1,138 @@
+"""
+Serialization microbenchmark for time-record list responses.
+
+Compares, per N records with nested workers and property:
+  * fastapi    - response_model validation + serialize + stdlib json (the old path)
+  * adapter    - precompiled TypeAdapter validate + dump_json
+  * direct     - serialize_time_records + ORJSONResponse (the list endpoints)
+  * normalized - the ?shape=normalized body: workers and properties sent once
+
+Run: python benchmarks/serialization.py [--records 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import date, time as dtime, timedelta
+from decimal import Decimal
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.models import Property, TimeRecord, Worker
+from app.responses import ORJSONResponse
+from app.schemas.time_record import TimeRecordResponse
+from app.services.serialization import (
+    serialize_time_records,
+    serialize_time_records_normalized,
+    time_record_list_adapter,
+)
+
+
+def build_records(count: int) -> List[TimeRecord]:
+    """Detached ORM objects shaped like a season of records."""
+    workers = [
+        Worker(id=i, name=f"Worker {i}", phone="204-555-0100", hourly_rate=Decimal("20.00") + i, is_active=True)
+        for i in range(1, 7)
+    ]
+    properties = [
+        Property(id=i, name=f"Property {i}", address=f"{i} Main St",
+                 is_spring_cleanup=i % 3 == 0, is_fall_cleanup=i % 5 == 0, is_active=True)
+        for i in range(1, 41)
+    ]
+    records = []
+    for i in range(count):
+        prop = properties[i % len(properties)]
+        record = TimeRecord(
+            id=i + 1,
+            property_id=prop.id,
+            work_date=date(2024, 4, 1) + timedelta(days=i % 200),
+            start_time=dtime(8, i % 60, 15),
+            end_time=dtime(11, 30),
+            break_minutes=15,
+            is_manual_entry=False,
+            notes="Mowed front and back lawn" if i % 4 == 0 else None,
+            total_minutes=180,
+            total_cost=Decimal("123.45"),
+            version=1,
+        )
+        record.property = prop
+        record.workers = workers[i % 3:i % 3 + 3]
+        records.append(record)
+    return records
+
+
+def fastapi_path(records) -> bytes:
+    field = create_response_field(name="response", type_=List[TimeRecordResponse])
+    content = asyncio.run(serialize_response(field=field, response_content=records))
+    return JSONResponse(content).body
+
+
+def adapter_path(records) -> bytes:
+    return time_record_list_adapter.dump_json(
+        time_record_list_adapter.validate_python(records, from_attributes=True)
+    )
+
+
+def direct_path(records) -> bytes:
+    return ORJSONResponse(serialize_time_records(records)).body
+
+
+def normalized_path(records) -> bytes:
+    return ORJSONResponse(serialize_time_records_normalized(records)).body
+
+
+def expand(body: dict) -> list:
+    """The full list shape rebuilt from a normalized body."""
+    return [
+        {
+            **{k: v for k, v in r.items() if k != "worker_ids"},
+            "workers": [body["workers"][str(i)] for i in r["worker_ids"]],
+            "property": body["properties"].get(str(r["property_id"])),
+        }
+        for r in body["records"]
+    ]
+
+
+PATHS = {
+    "fastapi": fastapi_path,
+    "adapter": adapter_path,
+    "direct": direct_path,
+    "normalized": normalized_path,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = build_records(args.records)
+
+    # All paths must produce the same JSON
+    outputs = {name: json.loads(fn(records)) for name, fn in PATHS.items()}
+    outputs["normalized"] = expand(outputs["normalized"])
+    assert all(output == outputs["fastapi"] for output in outputs.values()), "serializers disagree"
+
+    baseline = None
+    print(f"{'path':<12}{'ms / ' + str(args.records):>14}{'speedup':>10}{'bytes':>12}")
+    for name, fn in PATHS.items():
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = fn(records)
+            timings.append(time.perf_counter() - started)
+        best_ms = min(timings) * 1000
+        baseline = baseline or best_ms
+        print(f"{name:<12}{best_ms:>14.1f}{baseline / best_ms:>10.1f}{len(body):>12}")
+
+
+if __name__ == "__main__":
+    main()
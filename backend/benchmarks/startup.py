@@ -0,0 +1,101 @@
+"""
+Cold start benchmark for the API process.
+
+Measures, in fresh interpreters:
+  * import time of app.main
+  * time from spawning uvicorn until the first response from /api/health
+
+Run: python benchmarks/startup.py [--runs 5] [--max-import-ms 1500] [--max-first-response-ms 3000]
+
+Exits with status 1 when a median exceeds its budget, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_import_ms(env: dict) -> float:
+    """Import app.main in a new interpreter and return the import time."""
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=env
+    )
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def measure_first_response_ms(env: dict, timeout: float = 30.0) -> float:
+    """Start uvicorn and return the time until /api/health answers."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/api/health"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"Server did not respond within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-response-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///./app.db")
+
+    import_ms = [measure_import_ms(env) for _ in range(args.runs)]
+    first_response_ms = [measure_first_response_ms(env) for _ in range(args.runs)]
+
+    result = {
+        "import_ms_median": round(statistics.median(import_ms), 1),
+        "import_ms_max": round(max(import_ms), 1),
+        "first_response_ms_median": round(statistics.median(first_response_ms), 1),
+        "first_response_ms_max": round(max(first_response_ms), 1),
+        "runs": args.runs,
+    }
+    print(json.dumps(result, indent=2))
+
+    failed = False
+    if args.max_import_ms is not None and result["import_ms_median"] > args.max_import_ms:
+        print(f"✗ Import time over budget ({args.max_import_ms} ms)")
+        failed = True
+    if args.max_first_response_ms is not None and result["first_response_ms_median"] > args.max_first_response_ms:
+        print(f"✗ Time to first response over budget ({args.max_first_response_ms} ms)")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Per-call Python overhead of the hot statements, rebuilt vs cached.
+
+Runs each lookup the old way (a Query assembled on every call) and through
+app.services.statements (lambda statements) against an in-memory SQLite
+database, so the time is almost all SQLAlchemy's Python work: building the
+statement, computing its cache key, executing and loading the objects.
+
+  * user        - current-user lookup by username (every authenticated request)
+  * record      - record by id with workers and property (timer stop, edits)
+  * today       - today's records with workers and property
+  * overlaps    - worker IN-list overlap check (every timer write)
+  * property    - property by id
+
+Run: python benchmarks/statements.py [--records 200] [--repeat 2000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, time as clock
+from decimal import Decimal
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import joinedload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Property, TimeRecord, User, Worker
+from app.models.time_record import time_record_workers
+from app.models.user import UserRole
+from app.services.overlaps import find_overlaps
+from app.services.statements import property_by_id, record_by_id, records_on, user_by_username
+
+
+def build(records: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(username="admin", hashed_password="x", role=UserRole.ADMIN))
+    workers = [Worker(name=f"Worker {i}", hourly_rate=Decimal("20.00")) for i in range(1, 9)]
+    properties = [Property(name=f"Property {i}", address=f"{i} Main St") for i in range(1, 21)]
+    db.add_all(workers + properties)
+    today = date.today()
+    for i in range(records):
+        record = TimeRecord(
+            property=properties[i % len(properties)],
+            work_date=today,
+            start_time=clock(6 + i % 12, i % 60),
+            end_time=clock(7 + i % 12, i % 60),
+        )
+        record.workers = [workers[i % 8], workers[(i + 3) % 8]]
+        db.add(record)
+    db.commit()
+    return db, today
+
+
+def rebuilt(db, today):
+    return {
+        "user": lambda: db.query(User).filter(User.username == "admin").first(),
+        "record": lambda: db.query(TimeRecord).options(
+            joinedload(TimeRecord.workers), joinedload(TimeRecord.property)
+        ).filter(TimeRecord.id == 1).first(),
+        "today": lambda: db.query(TimeRecord).options(
+            joinedload(TimeRecord.workers), joinedload(TimeRecord.property)
+        ).filter(TimeRecord.work_date == today).order_by(TimeRecord.start_time.desc()).all(),
+        "overlaps": lambda: db.query(
+            time_record_workers.c.worker_id, TimeRecord.id, TimeRecord.start_time, TimeRecord.end_time
+        ).join(TimeRecord, TimeRecord.id == time_record_workers.c.time_record_id).filter(
+            time_record_workers.c.worker_id.in_([1, 2, 3]),
+            TimeRecord.work_date == today,
+            or_(TimeRecord.end_time.is_(None), TimeRecord.end_time > clock(9)),
+            TimeRecord.start_time < clock(10),
+        ).order_by(TimeRecord.start_time, TimeRecord.id).all(),
+        "property": lambda: db.query(Property).filter(Property.id == 1).first(),
+    }
+
+
+def cached(db, today):
+    return {
+        "user": lambda: user_by_username(db, "admin"),
+        "record": lambda: record_by_id(db, 1),
+        "today": lambda: records_on(db, today),
+        "overlaps": lambda: find_overlaps(db, [1, 2, 3], today, clock(9), clock(10)),
+        "property": lambda: property_by_id(db, 1),
+    }
+
+
+def per_call(fn, repeat: int) -> float:
+    fn()
+    began = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - began) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=200, help="records on today's date")
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    db, today = build(args.records)
+    old, new = rebuilt(db, today), cached(db, today)
+    print(f"{'statement':<10} {'rebuilt':>12} {'cached':>12} {'saved':>12}")
+    for name in old:
+        # Each side starts from an empty identity map, as a request does
+        db.expunge_all()
+        before = per_call(old[name], args.repeat)
+        db.expunge_all()
+        after = per_call(new[name], args.repeat)
+        print(
+            f"{name:<10} {before * 1e6:>10.1f}us {after * 1e6:>10.1f}us "
+            f"{(before - after) * 1e6:>8.1f}us ({(1 - after / before) * 100:.0f}%)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Production server configuration.
+
+Run: gunicorn -c gunicorn.conf.py app.main:app
+
+Environment:
+  WEB_CONCURRENCY      worker processes (default: number of CPU cores)
+  PORT                 listen port (default: 8000)
+  MAX_REQUESTS         recycle a worker after this many requests (default: 2000, 0 disables)
+  MAX_REQUESTS_JITTER  random spread so workers don't all restart together (default: 200)
+  ACCESS_LOG           access log target (default: "-" for stdout, empty to disable)
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers share its memory copy-on-write
+preload_app = True
+
+# Restart workers periodically to cap memory growth
+max_requests = int(os.environ.get("MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.environ.get("MAX_REQUESTS_JITTER", "200"))
+
+# Give in-flight requests (e.g. Excel exports) time to finish on recycle
+graceful_timeout = 30
+timeout = 120
+keepalive = 5
+
+# Set ACCESS_LOG to an empty string to turn request logging off
+accesslog = os.environ.get("ACCESS_LOG", "-") or None
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master.
+
+    Per-worker warm-up (connection pool, caches) runs afterwards in the
+    app's lifespan startup, see app.main.on_startup.
+    """
+    from app.database import dispose_engines
+
+    dispose_engines()
+
+
+def worker_exit(server, worker):
+    """Close this worker's database connections and export processes cleanly."""
+    from app.database import engine, reports_engine
+    from app.services.export_bundle import shutdown_pool
+
+    shutdown_pool(wait=False)
+
+    engine.dispose()
+    if reports_engine is not None:
+        reports_engine.dispose()
@@ -0,0 +1,49 @@
+"""
+Import historical timesheets from an XLSX or CSV file.
+Run: python import_timesheets.py timesheets.xlsx [--batch-size 1000]
+
+Columns: date, property, workers, start, end, break, notes
+Unknown workers and properties are created.
+"""
+import argparse
+import json
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.services.importer import TimesheetFormatError, read_timesheet, import_timesheet_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import historical timesheets.")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--errors", action="store_true", help="print the per-row error report")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            result = import_timesheet_rows(db, read_timesheet(f, args.path), args.batch_size)
+    except TimesheetFormatError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    summary = result.as_dict()
+    errors = summary.pop("errors")
+    print(f"✓ Imported {summary['imported']:,} of {summary['rows_read']:,} rows "
+          f"in {summary['seconds']}s ({summary['rows_per_second']:,} rows/s)")
+    print(f"  Created {summary['workers_created']} workers, {summary['properties_created']} properties")
+    if summary["failed"]:
+        print(f"  {summary['failed']} rows failed")
+        if args.errors:
+            print(json.dumps(errors, indent=2))
+        else:
+            for e in errors[:10]:
+                print(f"    row {e['row']}: {e['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Create any missing database tables.
+Run before starting the API: python init_db.py
+"""
+import sys
+sys.path.insert(0, '.')
+
+from app.database import init_db
+
+
+if __name__ == "__main__":
+    init_db()
+    print("✓ Database tables are up to date")
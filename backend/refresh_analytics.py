@@ -0,0 +1,38 @@
+"""
+Refresh the columnar snapshot behind /api/reports/analytics.
+Run: python refresh_analytics.py [--full] [--dir ./analytics]
+
+Appends records closed since the last run, or rebuilds from scratch with
+--full or once the snapshot is older than ANALYTICS_FULL_REBUILD_HOURS.
+Schedule it (e.g. every 15 minutes from cron) to keep analytics current.
+"""
+import argparse
+import sys
+import time
+sys.path.insert(0, '.')
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.analytics import refresh_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the analytics snapshot.")
+    parser.add_argument("--full", action="store_true", help="rebuild instead of appending")
+    parser.add_argument("--dir", default=settings.ANALYTICS_SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        meta = refresh_snapshot(db, args.dir, settings.ANALYTICS_FULL_REBUILD_HOURS, full=args.full)
+    finally:
+        db.close()
+    print(
+        f"✅ {meta['count']:,} records in {meta['generation']} "
+        f"({len(meta['open_ids'])} running timers pending), {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
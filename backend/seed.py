@@ -1,19 +1,33 @@
 """
 Seed script to create initial users and sample data.
 Run: python seed.py
+
+Generate a large synthetic history for performance testing:
+  python seed.py --generate --records 5000000 --properties 3000 --workers 2000 --seasons 6 --seed 42
+
+The generated data is deterministic for a given seed when the database
+starts empty.
 """
+import argparse
+import random
 import sys
+import time as timer
+from datetime import date, datetime, time, timedelta
 sys.path.insert(0, '.')
 
-from app.database import SessionLocal, engine, Base
-from app.models import User, UserRole, Worker, Property
+from sqlalchemy import insert, select, func
+
+from app.database import SessionLocal, engine, init_db
+from app.models import (
+    User, UserRole, Worker, Property, TimeRecord, ArchivedTimeRecord, time_record_workers, compute_totals,
+)
 from app.auth import get_password_hash
 
 
 def seed_database():
     """Create initial data in the database."""
     # Create tables
-    Base.metadata.create_all(bind=engine)
+    init_db()
     
     db = SessionLocal()
     
@@ -87,5 +101,281 @@ def seed_database():
         db.close()
 
 
-if __name__ == "__main__":
+FIRST_NAMES = [
+    "Alex", "Mike", "John", "Chris", "Sam", "Jordan", "Taylor", "Ryan", "Kyle", "Ben",
+    "Matt", "Nick", "Tyler", "Josh", "Dan", "Eric", "Adam", "Luke", "Noah", "Owen",
+    "Jesse", "Cole", "Evan", "Liam", "Mark", "Paul", "Sean", "Tom", "Zach", "Dylan",
+]
+SURNAMES = [
+    "Smith", "Johnson", "Brown", "Wilson", "Martin", "Anderson", "Thompson", "Campbell",
+    "Stewart", "Roy", "Taylor", "Lee", "White", "Clark", "Young", "Walker", "Hall",
+    "Wright", "King", "Scott", "Green", "Baker", "Adams", "Nelson", "Hill", "Moore",
+]
+STREETS = [
+    "Main St", "Oak Ave", "Park Blvd", "Pembina Hwy", "Portage Ave", "Corydon Ave",
+    "Grant Ave", "Henderson Hwy", "St Mary's Rd", "Wellington Cres", "River Rd", "Elm St",
+]
+PROPERTY_KINDS = ["House", "Residence", "Condos", "Plaza", "Church", "Clinic", "Office"]
+NOTES = [
+    "Mowed front and back lawn", "Trimmed hedges", "Aerated back lawn", "Hauled 3 loads",
+    "Raked leaves", "Edged beds", "Mulched gardens", "Power raked", "Cleaned gutters",
+    "Planted annuals", "Fertilized lawn", "Pruned shrubs",
+]
+
+# Working season of a landscaping year
+SEASON_START = (4, 1)
+SEASON_END = (11, 15)
+SPRING_CLEANUP_END = (5, 31)
+FALL_CLEANUP_START = (10, 1)
+# Crews work their jobs one after another inside these hours
+WORKDAY = (7 * 60, 19 * 60)
+MAX_JOBS_PER_CREW_DAY = 8
+# Shortest share of the workday a job is scheduled in, travel included
+MIN_JOB_SLOT = 45
+
+
+def _season_days(seasons: int, today: date):
+    """Working days (Mon-Sat) of the last `seasons` seasons up to today."""
+    days = []
+    for year in range(today.year - seasons + 1, today.year + 1):
+        day = date(year, *SEASON_START)
+        end = min(date(year, *SEASON_END), today)
+        while day <= end:
+            if day.weekday() < 6:
+                days.append(day)
+            day += timedelta(days=1)
+    return days
+
+
+def _crew_day(rng, jobs: int, day_start: int, day_end: int):
+    """(start, end, break) minutes of a crew's consecutive jobs within the day.
+
+    The day is cut into equal slots, one per job. Each job starts after a
+    short drive into its slot and finishes before the next slot begins,
+    so a crew's jobs never overlap.
+    """
+    slot = (day_end - day_start) // jobs // 5 * 5
+    schedule = []
+    for j in range(jobs):
+        start = day_start + j * slot + rng.randrange(0, 16, 5)
+        room = day_start + (j + 1) * slot - 5 - start
+        work = rng.randrange(20, min(240, room) + 1, 5)
+        break_minutes = rng.choice([0, 0, 0, 15, 30]) if work > 120 else 0
+        if work + break_minutes > room:
+            work -= break_minutes
+        schedule.append((start, start + work + break_minutes, break_minutes))
+    return schedule
+
+
+def _max_id(conn, column):
+    return conn.execute(select(func.max(column))).scalar() or 0
+
+
+def generate_dataset(
+    records: int = 100000,
+    properties: int = 2000,
+    workers: int = 150,
+    seasons: int = 5,
+    seed: int = 42,
+    batch_size: int = 20000,
+):
+    """Bulk-insert a realistic multi-season history.
+
+    Workers are grouped into stable crews of 2-4 and each record is one
+    crew's visit to a property. A crew works up to MAX_JOBS_PER_CREW_DAY
+    jobs a day one after another, so no worker is on two records at once.
+    Spring and fall cleanup properties get most of their visits in their
+    season. Today's jobs all started before now, and crews still out have
+    their last job of the day as a running timer. Rows go in through Core executemany inserts in batches of
+    `batch_size`, with ids assigned here so association rows need no
+    round-trip.
+    """
+    init_db()
     seed_database()
+
+    rng = random.Random(seed)
+    today = date.today()
+    started = timer.perf_counter()
+
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            # Bulk load speed over durability; the data is synthetic
+            conn.exec_driver_sql("PRAGMA synchronous=OFF")
+            conn.exec_driver_sql("PRAGMA journal_mode=MEMORY")
+
+        # Workers
+        first_worker_id = _max_id(conn, Worker.id) + 1
+        worker_rows = [
+            {
+                "id": first_worker_id + i,
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)[0]}.",
+                "phone": f"204-555-{rng.randrange(10000):04d}",
+                "hourly_rate": rng.choice([18, 19, 20, 20, 21, 22, 24, 26, 28, 32]),
+                "is_active": rng.random() > 0.1,
+            }
+            for i in range(workers)
+        ]
+        conn.execute(insert(Worker), worker_rows)
+        rates = {w["id"]: w["hourly_rate"] for w in worker_rows}
+
+        # Properties
+        first_property_id = _max_id(conn, Property.id) + 1
+        property_rows = []
+        for i in range(properties):
+            kind = rng.random()
+            property_rows.append({
+                "id": first_property_id + i,
+                "name": f"{rng.choice(SURNAMES)} {rng.choice(PROPERTY_KINDS)} {i + 1}",
+                "address": f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+                "is_spring_cleanup": kind < 0.2,
+                "is_fall_cleanup": 0.2 <= kind < 0.4,
+                "is_active": rng.random() > 0.05,
+            })
+        conn.execute(insert(Property), property_rows)
+        conn.commit()
+        print(f"✓ Created {workers} workers and {properties} properties")
+
+        regular = [p["id"] for p in property_rows if not (p["is_spring_cleanup"] or p["is_fall_cleanup"])]
+        spring = [p["id"] for p in property_rows if p["is_spring_cleanup"]] or regular
+        fall = [p["id"] for p in property_rows if p["is_fall_cleanup"]] or regular
+
+        # Stable crews of 2-4 workers; some records are solo jobs
+        worker_ids = list(rates)
+        rng.shuffle(worker_ids)
+        crews = []
+        i = 0
+        while i < len(worker_ids):
+            size = rng.randint(2, 4)
+            crews.append(worker_ids[i:i + size])
+            i += size
+
+        days = _season_days(seasons, today)
+        # Archived records keep their ids, so new ones start above both tables
+        next_id = max(_max_id(conn, TimeRecord.id), _max_id(conn, ArchivedTimeRecord.id)) + 1
+        record_rows, link_rows = [], []
+        inserted = 0
+
+        def flush():
+            nonlocal record_rows, link_rows, inserted
+            if record_rows:
+                conn.execute(insert(TimeRecord), record_rows)
+                conn.execute(insert(time_record_workers), link_rows)
+                conn.commit()
+                inserted += len(record_rows)
+                elapsed = timer.perf_counter() - started
+                print(f"  {inserted:,} records ({inserted / elapsed:,.0f}/s)", end="\r", flush=True)
+            record_rows, link_rows = [], []
+
+        # Jobs each crew can fit on each day; today ends now
+        now = datetime.now()
+        day_ends = {day: WORKDAY[1] for day in days}
+        if today in day_ends:
+            day_ends[today] = min(WORKDAY[1], (now.hour * 60 + now.minute) // 5 * 5)
+        per_crew = {
+            day: min(MAX_JOBS_PER_CREW_DAY, max(0, day_ends[day] - WORKDAY[0]) // MIN_JOB_SLOT)
+            for day in days
+        }
+        capacity = sum(per_crew.values()) * len(crews)
+        if records > capacity:
+            raise ValueError(
+                f"{records:,} records don't fit in {len(crews)} crews' schedules "
+                f"(at most {capacity:,}); add workers or seasons"
+            )
+
+        # Spread records over the days by how many jobs each can hold, oldest first
+        jobs_by_day, placed, seen = [], 0, 0
+        for day in days:
+            seen += per_crew[day] * len(crews)
+            count = records * seen // max(capacity, 1) - placed
+            placed += count
+            jobs_by_day.append((day, count))
+
+        def scheduled():
+            """(day, crew, (start, end, break), is_running) of every job in order."""
+            for day, count in jobs_by_day:
+                if not count:
+                    continue
+                # Up to per_crew[day] jobs for each crew
+                crew_jobs = [0] * len(crews)
+                for slot in rng.sample(range(len(crews) * per_crew[day]), count):
+                    crew_jobs[slot % len(crews)] += 1
+                working = [c for c in range(len(crews)) if crew_jobs[c]]
+                running = set(rng.sample(working, min(len(working), 10))) if day == today else set()
+                for c in working:
+                    schedule = _crew_day(rng, crew_jobs[c], WORKDAY[0], day_ends[day])
+                    for j, job in enumerate(schedule):
+                        is_running = c in running and j == len(schedule) - 1
+                        yield day, crews[c], job, is_running
+
+        for n, (day, crew, (start_minutes, end_minutes, break_minutes), is_running) in enumerate(scheduled()):
+            if (day.month, day.day) <= SPRING_CLEANUP_END and rng.random() < 0.6:
+                property_id = rng.choice(spring)
+            elif (day.month, day.day) >= FALL_CLEANUP_START and rng.random() < 0.6:
+                property_id = rng.choice(fall)
+            else:
+                property_id = rng.choice(regular)
+
+            if rng.random() < 0.1:
+                crew = [rng.choice(crew)]
+
+            if is_running:
+                break_minutes = 0
+            start_time = time(start_minutes // 60, start_minutes % 60)
+            end_time = None if is_running else time(end_minutes // 60, end_minutes % 60)
+
+            total_minutes = total_cost = None
+            if end_time is not None:
+                total_minutes, total_cost = compute_totals(
+                    start_time, end_time, break_minutes, [rates[w] for w in crew]
+                )
+                total_cost = round(total_cost, 2)
+
+            record_id = next_id + n
+            record_rows.append({
+                "id": record_id,
+                "property_id": property_id,
+                "work_date": day,
+                "start_time": start_time,
+                "end_time": end_time,
+                "break_minutes": break_minutes,
+                "is_manual_entry": rng.random() < 0.15,
+                "notes": rng.choice(NOTES) if rng.random() < 0.3 else None,
+                "total_minutes": total_minutes,
+                "total_cost": total_cost,
+            })
+            link_rows.extend({"time_record_id": record_id, "worker_id": w} for w in crew)
+
+            if len(record_rows) >= batch_size:
+                flush()
+        flush()
+
+    elapsed = timer.perf_counter() - started
+    print(f"\n✅ Generated {records:,} time records in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database.")
+    parser.add_argument("--generate", action="store_true", help="generate a large synthetic dataset")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--properties", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=150)
+    parser.add_argument("--seasons", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=20000)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate_dataset(
+            records=args.records,
+            properties=args.properties,
+            workers=args.workers,
+            seasons=args.seasons,
+            seed=args.seed,
+            batch_size=args.batch_size,
+        )
+    else:
+        seed_database()
+
+
+if __name__ == "__main__":
+    main()
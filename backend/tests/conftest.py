@@ -0,0 +1,60 @@
+"""Fixtures for the backend tests.
+
+Each test run gets its own SQLite file, set before the app is imported so
+the engines in app.database point at it. Tables are emptied after every
+test.
+"""
+import os
+import tempfile
+
+_directory = tempfile.mkdtemp(prefix="dcland-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ.pop("REPORTS_DATABASE_URL", None)
+
+from decimal import Decimal  # noqa: E402
+
+import pytest  # noqa: E402
+
+from app.database import Base, SessionLocal, engine, init_db  # noqa: E402
+from app.models import Property, User, Worker  # noqa: E402
+from app.models.user import UserRole  # noqa: E402
+from app.services.dimensions import dimension_cache  # noqa: E402
+
+init_db()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+        dimension_cache.invalidate()
+
+
+@pytest.fixture
+def admin(db):
+    user = User(username="admin", hashed_password="x", role=UserRole.ADMIN)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def property_(db):
+    prop = Property(name="City Park", address="789 Park Blvd")
+    db.add(prop)
+    db.commit()
+    return prop
+
+
+@pytest.fixture
+def worker(db):
+    worker = Worker(name="Alex", hourly_rate=Decimal("20.00"))
+    db.add(worker)
+    db.commit()
+    return worker
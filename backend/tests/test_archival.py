@@ -0,0 +1,31 @@
+from datetime import date, time
+
+from sqlalchemy import select
+
+from app.models.archive import ArchivedTimeRecord
+from app.models.time_record import TimeRecord
+from app.services.archival import archive_records
+
+
+def _record(db, property_, worker, work_date):
+    record = TimeRecord(
+        property_id=property_.id, work_date=work_date, start_time=time(8), end_time=time(9),
+    )
+    record.workers = [worker]
+    record.calculate_totals([worker])
+    db.add(record)
+    db.commit()
+    return record.id
+
+
+def test_archived_ids_are_not_reused(db, property_, worker):
+    first = [_record(db, property_, worker, date(2024, 5, day)) for day in (1, 2)]
+    assert archive_records(db, date(2026, 1, 1)) == 2
+
+    # The hot table is empty now; its next id must still be new
+    later = _record(db, property_, worker, date(2024, 5, 3))
+    assert later > max(first)
+
+    assert archive_records(db, date(2026, 1, 1)) == 1
+    archived = db.execute(select(ArchivedTimeRecord.id).order_by(ArchivedTimeRecord.id)).scalars().all()
+    assert archived == first + [later]
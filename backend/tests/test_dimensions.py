@@ -0,0 +1,34 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from app.database import SessionLocal
+from app.models.time_record import TimeRecord
+from app.models.worker import Worker
+from app.schemas.time_record import TimerEventIn
+from app.services.dimensions import dimension_cache
+from app.services.timer_events import apply_timer_events
+
+
+def test_saved_totals_use_the_current_rate(db, admin, property_, worker):
+    # This process caches the old rate; another one changes it
+    dimension_cache.load(db)
+    with SessionLocal() as other:
+        other.get(Worker, worker.id).hourly_rate = Decimal("30.00")
+        other.commit()
+
+    yesterday = date.today() - timedelta(days=1)
+    events = [
+        TimerEventIn(
+            event_id="e1", type="start", occurred_at=datetime.combine(yesterday, time(8)),
+            property_id=property_.id, worker_ids=[worker.id],
+        ),
+        TimerEventIn(
+            event_id="e2", type="stop", occurred_at=datetime.combine(yesterday, time(11)),
+            start_event_id="e1", worker_ids=[worker.id],
+        ),
+    ]
+    with SessionLocal() as request:
+        outcomes = apply_timer_events(request, admin, events)
+        assert [o["status"] for o in outcomes] == ["applied", "applied"]
+        record = request.get(TimeRecord, outcomes[0]["time_record_id"])
+        assert record.total_cost == Decimal("90.00")
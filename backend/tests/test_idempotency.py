@@ -0,0 +1,38 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.models import IdempotencyKey
+
+
+def _worker(calls):
+    """One server process: its own app and middleware on the shared database."""
+    app = FastAPI()
+
+    @app.post("/api/time-records/start")
+    def start(body: dict):
+        calls.append(body)
+        return {"id": len(calls)}
+
+    app.add_middleware(IdempotencyMiddleware, session_factory=SessionLocal, path_prefixes=["/api/time-records"])
+    return TestClient(app)
+
+
+def test_retry_on_another_worker_is_replayed(db):
+    calls = []
+    first, second = _worker(calls), _worker(calls)
+    headers = {"Authorization": "Bearer not-a-jwt", "Idempotency-Key": "start-1"}
+
+    r1 = first.post("/api/time-records/start", json={"property_id": 1}, headers=headers)
+    r2 = second.post("/api/time-records/start", json={"property_id": 1}, headers=headers)
+
+    assert r1.status_code == r2.status_code == 200
+    assert r2.json() == r1.json() == {"id": 1}
+    assert r2.headers["idempotent-replayed"] == "true"
+    assert len(calls) == 1
+    assert db.query(IdempotencyKey).count() == 1
+
+    r3 = second.post("/api/time-records/start", json={"property_id": 2}, headers=headers)
+    assert r3.status_code == 422
+    assert len(calls) == 1
@@ -0,0 +1,23 @@
+import io
+
+from app.services.importer import MAX_PROPERTY_NAME, MAX_WORKER_NAME, import_timesheet_rows, read_csv
+
+
+def _import(db, lines):
+    return import_timesheet_rows(db, read_csv(io.StringIO("\n".join(lines))))
+
+
+def test_long_names_fail_only_their_row(db):
+    long_worker = "W" * (MAX_WORKER_NAME + 1)
+    long_property = "P" * (MAX_PROPERTY_NAME + 1)
+    result = _import(db, [
+        "date,property,workers,start,end",
+        f"2024-05-01,City Park,{long_worker},08:00,09:00",
+        f"2024-05-01,{long_property},Alex,08:00,09:00",
+        "2024-05-02,City Park,Alex,08:00,09:00",
+    ])
+
+    assert result.imported == 1
+    assert [e["row"] for e in result.errors] == [2, 3]
+    assert "longer than" in result.errors[0]["error"]
+    assert (result.workers_created, result.properties_created) == (1, 1)
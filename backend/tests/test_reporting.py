@@ -0,0 +1,31 @@
+from datetime import date, time
+
+from app.models.time_record import TimeRecord
+from app.services.archival import archive_records
+from app.services.reporting import run_report
+
+
+def _record(db, property_, worker, work_date):
+    record = TimeRecord(
+        property_id=property_.id, work_date=work_date, start_time=time(8), end_time=time(9),
+    )
+    record.workers = [worker]
+    record.calculate_totals([worker])
+    db.add(record)
+    db.commit()
+    return record.id
+
+
+def test_live_and_archived_rows_are_merged_newest_first(db, property_, worker):
+    archived = _record(db, property_, worker, date(2023, 6, 1))
+    assert archive_records(db, date(2024, 1, 1)) == 1
+    # Imported history can be older than the archive
+    imported = _record(db, property_, worker, date(2022, 6, 1))
+    recent = _record(db, property_, worker, date(2024, 6, 1))
+
+    report = run_report(db, date(2022, 1, 1), date(2024, 12, 31))
+    assert [row.id for row in report.rows] == [recent, archived, imported]
+    assert report.records_count == 3
+
+    page = run_report(db, date(2022, 1, 1), date(2024, 12, 31), offset=1, limit=1)
+    assert [row.id for row in page.rows] == [archived]
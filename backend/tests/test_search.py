@@ -0,0 +1,27 @@
+from datetime import date, time
+
+from app.models.time_record import TimeRecord
+from app.services.archival import archive_records
+from app.services.search import search_notes
+
+
+def _record(db, property_, worker, work_date, notes):
+    record = TimeRecord(
+        property_id=property_.id, work_date=work_date, start_time=time(8), end_time=time(9), notes=notes,
+    )
+    record.workers = [worker]
+    record.calculate_totals([worker])
+    db.add(record)
+    db.commit()
+    return record.id
+
+
+def test_archived_notes_are_searched_when_the_range_reaches_them(db, property_, worker):
+    archived = _record(db, property_, worker, date(2023, 6, 1), "hauled mulch")
+    live = _record(db, property_, worker, date(2024, 6, 1), "hauling mulch")
+    assert archive_records(db, date(2024, 1, 1)) == 1
+
+    assert search_notes(db, "haul") == (2, [live, archived])
+    assert search_notes(db, "haul", start_date=date(2023, 1, 1)) == (2, [live, archived])
+    assert search_notes(db, "haul", start_date=date(2024, 1, 1)) == (1, [live])
+    assert search_notes(db, "haul", limit=1, offset=1) == (2, [archived])
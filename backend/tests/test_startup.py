@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_importing_the_app_skips_heavy_modules_and_the_database(tmp_path):
+    database = tmp_path / "startup.db"
+    script = (
+        "import sys\n"
+        "import app.main\n"
+        "print(' '.join(m for m in ('numpy', 'openpyxl') if m in sys.modules))\n"
+    )
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+    env.pop("REPORTS_DATABASE_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    assert result.stdout.strip() == ""
+    # Schema creation waits for startup
+    assert not database.exists()
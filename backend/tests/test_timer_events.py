@@ -0,0 +1,91 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.database import SessionLocal
+from app.models.time_record import TimeRecord
+from app.models.timer_event import TimerEvent
+from app.models.user import User, UserRole
+from app.schemas.time_record import TimerEventIn
+from app.services import timer_events
+from app.services.timer_events import apply_timer_events
+
+
+def _counts():
+    with SessionLocal() as other:
+        return (
+            other.execute(select(func.count(TimeRecord.id))).scalar(),
+            other.execute(select(func.count(TimerEvent.event_id))).scalar(),
+        )
+
+
+# Inside the replay window whatever the time of day the tests run
+YESTERDAY = date.today() - timedelta(days=1)
+
+
+def _at(hour):
+    return datetime.combine(YESTERDAY, time(hour))
+
+
+def _start(event_id, property_, worker, hour=8):
+    return TimerEventIn(
+        event_id=event_id, type="start", occurred_at=_at(hour),
+        property_id=property_.id, worker_ids=[worker.id],
+    )
+
+
+def test_batch_is_applied_and_stored(db, admin, property_, worker):
+    stop = TimerEventIn(event_id="e2", type="stop", occurred_at=_at(12), start_event_id="e1")
+    outcomes = apply_timer_events(db, admin, [_start("e1", property_, worker), stop])
+
+    assert [o["status"] for o in outcomes] == ["applied", "applied"]
+    assert _counts() == (1, 2)
+
+
+def test_failing_event_leaves_nothing_committed(db, admin, property_, worker, monkeypatch):
+    def explode(self, event, at):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(timer_events._Replay, "stop", explode)
+    stop = TimerEventIn(event_id="e2", type="stop", occurred_at=_at(12), start_event_id="e1")
+
+    with pytest.raises(RuntimeError):
+        apply_timer_events(db, admin, [_start("e1", property_, worker), stop])
+    db.rollback()
+
+    # The first event's savepoint was released but never committed
+    assert _counts() == (0, 0)
+
+    # So a retry of the batch starts the timer exactly once
+    monkeypatch.undo()
+    outcomes = apply_timer_events(db, admin, [_start("e1", property_, worker), stop])
+    assert [o["status"] for o in outcomes] == ["applied", "applied"]
+    assert _counts() == (1, 2)
+
+
+def test_worker_cannot_edit_yesterdays_record(db, admin, property_, worker):
+    stop = TimerEventIn(event_id="e2", type="stop", occurred_at=_at(12), start_event_id="e1")
+    apply_timer_events(db, admin, [_start("e1", property_, worker), stop])
+    record_id = db.execute(select(TimeRecord.id)).scalar()
+
+    crew = User(username="crew", hashed_password="x", role=UserRole.WORKER)
+    db.add(crew)
+    db.commit()
+    # Backdated so the event's own day matches the record
+    edit = TimerEventIn(event_id="e3", type="edit", occurred_at=_at(13), time_record_id=record_id, notes="changed")
+    [outcome] = apply_timer_events(db, crew, [edit])
+
+    assert outcome["status"] == "rejected"
+    assert db.get(TimeRecord, record_id).notes is None
+
+
+@pytest.mark.parametrize("occurred_at", [datetime(2020, 1, 1, 8), datetime.now() + timedelta(days=1)])
+def test_events_outside_the_replay_window_are_rejected(db, admin, property_, worker, occurred_at):
+    start = TimerEventIn(
+        event_id="e1", type="start", occurred_at=occurred_at, property_id=property_.id, worker_ids=[worker.id],
+    )
+    [outcome] = apply_timer_events(db, admin, [start])
+
+    assert outcome["status"] == "rejected"
+    assert _counts() == (0, 1)
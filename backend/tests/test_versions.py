@@ -0,0 +1,37 @@
+from datetime import date, time
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.database import SessionLocal
+from app.models.time_record import TimeRecord
+from app.models.worker import Worker
+
+
+def test_crew_change_bumps_the_version(db, property_, worker):
+    record = TimeRecord(property_id=property_.id, work_date=date.today(), start_time=time(8))
+    record.workers = [worker]
+    db.add(record)
+    db.commit()
+    assert record.version == 1
+
+    other_worker = Worker(name="Sam", hourly_rate=Decimal("20.00"))
+    db.add(other_worker)
+    db.commit()
+
+    with SessionLocal() as stale:
+        stale_record = stale.get(TimeRecord, record.id)
+
+        record.replace_workers([worker, other_worker])
+        db.commit()
+        assert record.version == 2
+
+        # The same crew again is not a change
+        record.replace_workers([other_worker, worker])
+        db.commit()
+        assert record.version == 2
+
+        stale_record.replace_workers([stale.get(Worker, other_worker.id)])
+        with pytest.raises(StaleDataError):
+            stale.commit()
@@ -12,6 +12,24 @@ api.interceptors.request.use((config) => {
   return config
 })
 
+// Waits before each retry of a write that got no response
+const RETRY_DELAYS_MS = [1000, 3000, 10000]
+
+// One Idempotency-Key per action, sent again on every retry, so a write
+// that reached the server before the connection dropped isn't applied twice
+const postIdempotent = async (url, data) => {
+  const headers = { 'Idempotency-Key': crypto.randomUUID() }
+  for (let attempt = 0; ; attempt++) {
+    try {
+      return await api.post(url, data, { headers })
+    } catch (err) {
+      // A response means the server decided; only network errors are retried
+      if (err.response || attempt >= RETRY_DELAYS_MS.length) throw err
+      await new Promise((resolve) => setTimeout(resolve, RETRY_DELAYS_MS[attempt]))
+    }
+  }
+}
+
 export const authApi = {
   login: (username, password) => api.post('/auth/login', { username, password }),
   getMe: () => api.get('/auth/me'),
@@ -19,6 +37,7 @@ export const authApi = {
 
 export const workersApi = {
   getAll: () => api.get('/workers'),
+  search: (q, params) => api.get('/workers/search', { params: { q, ...params } }),
   create: (data) => api.post('/workers', data),
   update: (id, data) => api.put(`/workers/${id}`, data),
   delete: (id) => api.delete(`/workers/${id}`),
@@ -26,26 +45,41 @@ export const workersApi = {
 
 export const propertiesApi = {
   getAll: () => api.get('/properties'),
+  search: (q, params) => api.get('/properties/search', { params: { q, ...params } }),
   create: (data) => api.post('/properties', data),
   update: (id, data) => api.put(`/properties/${id}`, data),
   delete: (id) => api.delete(`/properties/${id}`),
 }
 
+// Records of a ?shape=normalized response with their workers and property filled back in
+export const expandRecords = ({ records, workers, properties }) =>
+  records.map((r) => ({
+    ...r,
+    workers: r.worker_ids.map((id) => workers[id]),
+    property: properties[r.property_id] ?? null,
+  }))
+
 export const timeRecordsApi = {
-  getAll: () => api.get('/time-records'),
+  getAll: (params) => api.get('/time-records', { params }),
   getToday: () => api.get('/time-records/today'),
-  create: (data) => api.post('/time-records', data),
-  update: (id, data) => api.put(`/time-records/${id}`, data),
+  search: (q, params) => api.get('/time-records/search', { params: { q, ...params } }),
+  create: (data) => postIdempotent('/time-records', data),
+  // With the version the record was loaded at, a conflicting edit gets 412
+  update: (id, data, version) =>
+    api.put(`/time-records/${id}`, data, version ? { headers: { 'If-Match': `"${version}"` } } : undefined),
   delete: (id) => api.delete(`/time-records/${id}`),
-  start: (data) => api.post('/time-records/start', data),
-  stop: (recordId) => api.post('/time-records/stop', { record_id: recordId }),
+  start: (data) => postIdempotent('/time-records/start', data),
+  stop: (data) => postIdempotent('/time-records/stop', data),
+  replayEvents: (events) => api.post('/time-records/events', { events }),
 }
 
 export const reportsApi = {
   getDashboard: () => api.get('/reports/dashboard'),
   getSummary: (params) => api.get('/reports/summary', { params }),
   preview: (params) => api.get('/reports/preview', { params }),
+  getOverview: (params) => api.get('/reports/overview', { params }),
   export: (params) => api.get('/reports/export', { params, responseType: 'blob' }),
+  exportBundle: (params) => api.get('/reports/export-bundle', { params, responseType: 'blob' }),
 }
 
 export default api
\ No newline at end of file